@@ -1,40 +1,1725 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from tkinter import font as tkfont
+import argparse
+import bisect
+import heapq
+import itertools
+import json
+import hashlib
+import marshal
+import os
+import queue
 import random
+import sqlite3
+import struct
+import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict, deque, namedtuple
+from contextlib import contextmanager, nullcontext
+from xml.sax.saxutils import escape
+
+
+class SeatUnavailableError(Exception):
+    """Raised when a seat cannot be booked under the layout rules"""
+
+
+class AvailabilitySnapshot(namedtuple(
+        "AvailabilitySnapshot", "show_id version rows cols occupied blocked free_count")):
+    """Immutable view of a seat map at one booking sequence number"""
+
+    __slots__ = ()
+
+    def is_free(self, row, col):
+        return not (self.occupied[row] | self.blocked[row]) >> col & 1
+
+    def as_grid(self):
+        """Return the snapshot as rows of SeatMap.FREE/BOOKED/BLOCKED values"""
+        return tuple(
+            tuple(SeatMap.BLOCKED if blocked >> col & 1 else SeatMap.BOOKED if occupied >> col & 1 else SeatMap.FREE
+                  for col in range(self.cols))
+            for occupied, blocked in zip(self.occupied, self.blocked)
+        )
+
+
+DEFAULT_LAYOUT = {
+    "name": "Main Hall",
+    "rows": [
+        {"label": "A", "seats": 5},
+        {"label": "B", "seats": 5},
+        {"label": "C", "seats": 5},
+        {"label": "D", "seats": 5},
+        {"label": "E", "seats": 5, "wheelchair": ["1", "5"], "companion": ["2", "4"]}
+    ]
+}
+
+
+class TheaterLayout:
+    """Auditorium layout compiled into label <-> index lookup tables
+
+    Layouts are JSON files of the form::
+
+        {"name": "Main Hall",
+         "rows": [{"label": "A", "seats": ["1", "2", null, "3", "4"]},
+                  {"label": "B", "seats": 8, "offset": 1, "curve": 0.5,
+                   "wheelchair": ["1"], "companion": ["2"], "blocked": ["8"]}]}
+
+    ``null`` entries are aisles or gaps, an integer ``seats`` is shorthand for
+    seats labelled 1..n, ``offset`` indents a row by whole seat positions and
+    ``curve`` is a per-row vertical displacement used when drawing curved rows.
+    Compiled layouts are cached next to the source file in marshal form,
+    which holds plain data only, keyed on a hash of the file's contents.
+    Loading marshal data never runs code, but marshal is not hardened
+    against crafted input, so the cache is trusted exactly as far as the
+    layout file beside it: keep layouts in a directory only their owner
+    can write.
+    """
+
+    CACHE_FORMAT = 2
+    _STATE_KEYS = frozenset((
+        "name", "rows", "cols", "row_labels", "row_curves", "seat_labels", "wheelchair", "companion",
+        "blocked", "row_index", "seat_index", "name_index", "seat_names", "row_seats", "seats", "gaps",
+        "column_labels"
+    ))
+
+    def __init__(self, name, row_labels, seat_labels, wheelchair=(), companion=(), blocked=(), row_curves=None):
+        self.name = name
+        self.rows = len(row_labels)
+        self.cols = max((len(labels) for labels in seat_labels), default=0)
+        self.row_labels = list(row_labels)
+        self.row_curves = list(row_curves or [0.0] * self.rows)
+        self.seat_labels = [list(labels) + [None] * (self.cols - len(labels)) for labels in seat_labels]
+        self.wheelchair = list(wheelchair)
+        self.companion = list(companion)
+        self.blocked = list(blocked)
+
+        # Lookup tables
+        self.row_index = {label: row for row, label in enumerate(self.row_labels)}
+        self.seat_index = {}
+        self.name_index = {}
+        self.seat_names = [[None] * self.cols for _ in range(self.rows)]
+        self.row_seats = {}
+        self.seats = []
+        self.gaps = []
+        for row, (row_label, labels) in enumerate(zip(self.row_labels, self.seat_labels)):
+            self.row_seats[row_label] = [label for label in labels if label is not None]
+            for col, seat_label in enumerate(labels):
+                if seat_label is None:
+                    self.gaps.append((row, col))
+                    continue
+                name = f"{row_label}{seat_label}"
+                self.seat_index[(row_label, seat_label)] = (row, col)
+                self.name_index[name] = (row, col)
+                self.seat_names[row][col] = name
+                self.seats.append((row, col))
+
+        # Column headers, where every row agrees on the seat label
+        self.column_labels = []
+        for col in range(self.cols):
+            labels = {self.seat_labels[row][col] for row in range(self.rows)} - {None}
+            self.column_labels.append(labels.pop() if len(labels) == 1 else None)
+
+    @classmethod
+    def from_dict(cls, spec):
+        """Compile a layout from its parsed JSON form, raising ValueError if it is invalid"""
+        if not spec.get("rows"):
+            raise ValueError("Layout has no rows")
+        row_labels, seat_labels, row_curves = [], [], []
+        wheelchair, companion, blocked = [], [], []
+        for row, row_spec in enumerate(spec["rows"]):
+            seats = row_spec["seats"]
+            if isinstance(seats, int):
+                seats = [str(n) for n in range(1, seats + 1)]
+            labels = [None] * row_spec.get("offset", 0) + [None if label is None else str(label) for label in seats]
+
+            label = str(row_spec["label"])
+            if label in row_labels:
+                raise ValueError(f"Duplicate row label {label!r}")
+            if len(set(labels) - {None}) != len(labels) - labels.count(None):
+                raise ValueError(f"Duplicate seat label in row {label!r}")
+            if labels.count(None) == len(labels):
+                raise ValueError(f"Row {label!r} has no seats")
+            row_labels.append(label)
+            seat_labels.append(labels)
+            row_curves.append(float(row_spec.get("curve", 0.0)))
+
+            for key, target in (("wheelchair", wheelchair), ("companion", companion), ("blocked", blocked)):
+                for seat_label in map(str, row_spec.get(key, ())):
+                    if seat_label not in labels:
+                        raise ValueError(f"Row {label!r} lists {key} seat {seat_label!r}, which is not in the row")
+                    target.append((row, labels.index(seat_label)))
+
+        return cls(spec.get("name", ""), row_labels, seat_labels, wheelchair, companion, blocked, row_curves)
+
+    def to_dict(self):
+        """Return the JSON form of this layout"""
+        rows = []
+        for row, label in enumerate(self.row_labels):
+            row_spec = {"label": label, "seats": self.seat_labels[row]}
+            if self.row_curves[row]:
+                row_spec["curve"] = self.row_curves[row]
+            for key, seats in (("wheelchair", self.wheelchair), ("companion", self.companion),
+                               ("blocked", self.blocked)):
+                labels = [self.seat_labels[r][c] for r, c in seats if r == row]
+                if labels:
+                    row_spec[key] = labels
+            rows.append(row_spec)
+        return {"name": self.name, "rows": rows}
+
+    @classmethod
+    def default(cls):
+        return cls.from_dict(DEFAULT_LAYOUT)
+
+    @classmethod
+    def load(cls, path, use_cache=True):
+        """Load a layout file, using its compiled cache when it is up to date"""
+        with open(path, "rb") as f:
+            source = f.read()
+        key = (cls.CACHE_FORMAT, hashlib.sha256(source).hexdigest())
+        cache_path = f"{path}.cache"
+
+        if use_cache:
+            try:
+                with open(cache_path, "rb") as f:
+                    cached = marshal.loads(f.read())
+                if (isinstance(cached, tuple) and len(cached) == 2 and cached[0] == key
+                        and isinstance(cached[1], dict) and cached[1].keys() == cls._STATE_KEYS):
+                    layout = cls.__new__(cls)
+                    layout.__dict__.update(cached[1])
+                    return layout
+            except (OSError, EOFError, ValueError, TypeError):
+                pass
+
+        layout = cls.from_dict(json.loads(source.decode("utf-8")))
+
+        if use_cache:
+            try:
+                with open(cache_path, "wb") as f:
+                    marshal.dump((key, layout.__dict__), f)
+            except (OSError, ValueError):
+                pass
+        return layout
+
+    def fingerprint(self):
+        """Return a hash of the seating plan, stored with each show to detect layout changes"""
+        return hashlib.sha256(json.dumps(self.to_dict(), sort_keys=True).encode("utf-8")).hexdigest()
+
+    def is_seat(self, row, col):
+        return 0 <= row < self.rows and 0 <= col < self.cols and self.seat_names[row][col] is not None
+
+    def seat_name(self, row, col):
+        return self.seat_names[row][col]
+
+    def locate(self, row_label, seat_label):
+        """Return (row, col) for a row and seat label, or None if there is no such seat"""
+        return self.seat_index.get((row_label, seat_label))
+
+    def parse(self, name):
+        """Return (row, col) for a seat name such as ``"A12"``, or None"""
+        return self.name_index.get(name)
+
+
+class Waitlist:
+    """Priority queue of party sizes waiting for seats on a sold-out show
+
+    Requests are bucketed by party size, each bucket a heap ordered by
+    (priority, arrival). Finding the best request that fits a free run of
+    ``n`` seats only looks at the heads of buckets 1..n, so matching cost
+    does not grow with the number of queued requests.
+    """
+
+    def __init__(self, max_party):
+        self.max_party = max_party
+        self._buckets = [[] for _ in range(max_party + 1)]
+        self._counter = itertools.count(1)
+        self.requests = {}
+
+    def __len__(self):
+        return len(self.requests)
+
+    def add(self, size, priority=0):
+        """Queue a party of ``size`` (lower priority values are served first) and return its request id"""
+        if size < 1 or size > self.max_party:
+            raise ValueError(f"Party size must be between 1 and {self.max_party}")
+        request_id = next(self._counter)
+        self.requests[request_id] = size
+        heapq.heappush(self._buckets[size], (priority, request_id))
+        return request_id
+
+    def cancel(self, request_id):
+        """Withdraw a request; its heap entry is dropped lazily"""
+        del self.requests[request_id]
+
+    def pop_best(self, max_size):
+        """Remove and return (request_id, size, priority) of the best request of at most ``max_size``"""
+        best = None
+        for size in range(1, min(max_size, self.max_party) + 1):
+            bucket = self._buckets[size]
+            while bucket and bucket[0][1] not in self.requests:
+                heapq.heappop(bucket)
+            if bucket and (best is None or bucket[0] < self._buckets[best][0]):
+                best = size
+        if best is None:
+            return None
+        priority, request_id = heapq.heappop(self._buckets[best])
+        del self.requests[request_id]
+        return request_id, best, priority
+
+    def restore(self, request_id, size, priority):
+        """Put back a request taken by ``pop_best``, keeping its place in the queue"""
+        self.requests[request_id] = size
+        heapq.heappush(self._buckets[size], (priority, request_id))
+
+
+class SeatMap:
+    """Seat state and layout constraints for one auditorium
+
+    Every row is kept as a set of integer bitmasks (bit ``col`` is the seat
+    in column ``col``), so rule checks are a handful of bitwise operations
+    per seat and party allocation never walks neighbours in Python.
+    """
+
+    FREE = 0
+    BOOKED = 1
+    BLOCKED = 2
+
+    # Attributes replaced wholesale by _reset
+    _RESET_STATE = ("occupied", "grid", "booked_seats", "orders", "_next_order", "holds", "_hold_expiries",
+                    "row_free", "free_count", "row_max_run", "_free_pool", "_pool_index")
+
+    def __init__(self, rows=5, cols=5, blocked=(), wheelchair=(), companion=(), distancing=False,
+                 show_id="main"):
+        self.show_id = show_id
+        self.rows = rows
+        self.cols = cols
+        self.distancing = distancing
+        self.full_row = (1 << cols) - 1
+
+        # Layout masks (fixed for the lifetime of the map)
+        self.blocked = self._build_mask(blocked)
+        self.wheelchair = self._build_mask(wheelchair)
+        self.companion = self._build_mask(companion)
+        self.restricted = [w | c for w, c in zip(self.wheelchair, self.companion)]
+
+        # Precomputed left/right neighbour mask for every column
+        self.neighbour_masks = [
+            ((1 << (col - 1)) if col > 0 else 0) | ((1 << (col + 1)) if col < cols - 1 else 0)
+            for col in range(cols)
+        ]
+
+        # Writers serialise on the lock; readers never take it. ``sequence`` is
+        # odd while seats are being changed, and sequence // 2 is the version of
+        # the last completed change (a seqlock). Writes that change nothing,
+        # such as a rejected booking, leave the version alone.
+        self._write_lock = threading.RLock()
+        self._write_depth = 0
+        self._changing = False
+        self.sequence = 0
+
+        # Parties waiting for seats, served whenever seats are released
+        self.waitlist = Waitlist(cols)
+        self.on_waitlist_allocated = None
+
+        # Optional persistence hook (e.g. SQLiteBookingStore), written before
+        # the in-memory state changes. Each outermost write runs in one journal
+        # transaction, so a cancellation and the waitlist allocation it
+        # triggers are committed together. While it is open, every in-memory
+        # change logs its inverse in ``_undo``; if the transaction fails the
+        # log is replayed backwards, so memory matches the rolled-back journal.
+        self.journal = None
+        self._undo = None
+
+        self.reset()
+
+    @property
+    def version(self):
+        return self.sequence >> 1
+
+    @contextmanager
+    def _writing(self):
+        with self._write_lock:
+            outermost = not self._write_depth and self.journal is not None
+            with self.journal.batch() if outermost else nullcontext():
+                if outermost:
+                    self._undo = []
+                self._write_depth += 1
+                try:
+                    yield
+                except BaseException:
+                    if outermost:
+                        undo, self._undo = self._undo, None
+                        for step in reversed(undo):
+                            step()
+                    raise
+                finally:
+                    if outermost:
+                        self._undo = None
+                    self._write_depth -= 1
+                    if not self._write_depth and self._changing:
+                        self._changing = False
+                        self.sequence += 1
+
+    def _record_undo(self, step):
+        """Log how to reverse an in-memory change made inside a journal transaction"""
+        if self._undo is not None:
+            self._undo.append(step)
+
+    def _restore_order(self, order_id, seats, expires_at):
+        self.orders[order_id] = seats
+        if expires_at is not None:
+            self.holds[order_id] = expires_at
+
+    def _mark_changed(self):
+        """Make the sequence odd before the first seat change of a write"""
+        if not self._changing:
+            self._changing = True
+            self.sequence += 1
+
+    @classmethod
+    def from_layout(cls, layout, distancing=False, show_id="main"):
+        """Create a seat map for a TheaterLayout; aisles and gaps are never bookable"""
+        return cls(
+            layout.rows, layout.cols,
+            blocked=layout.blocked + layout.gaps,
+            wheelchair=layout.wheelchair,
+            companion=layout.companion,
+            distancing=distancing,
+            show_id=show_id
+        )
+
+    def _build_mask(self, seats):
+        """Turn a list of (row, col) pairs into per-row bitmasks"""
+        masks = [0] * self.rows
+        for row, col in seats:
+            masks[row] |= 1 << col
+        return masks
+
+    def reset(self):
+        """Clear all bookings, keeping the layout"""
+        with self._writing():
+            if self.journal is not None:
+                self.journal.show_reset(self.show_id)
+            self._reset()
+            self._serve_waitlist(range(self.rows))
+
+    def _reset(self):
+        if self._undo is not None:
+            saved = {name: getattr(self, name) for name in self._RESET_STATE}
+            self._undo.append(lambda: self.__dict__.update(saved))
+        self._mark_changed()
+        self.occupied = [0] * self.rows
+        self.grid = [
+            [self.BLOCKED if self.blocked[row] >> col & 1 else self.FREE for col in range(self.cols)]
+            for row in range(self.rows)
+        ]
+        # Seat -> order id, in booking order; a dict so releases are O(1)
+        self.booked_seats = {}
+        self.orders = {}
+        self._next_order = 1
+
+        # Unconfirmed orders: order id -> expiry time, plus an expiry heap
+        self.holds = {}
+        self._hold_expiries = []
+
+        # Availability indexes, maintained incrementally by _occupy/_release
+        self.row_free = [bin(self.full_row & ~mask).count("1") for mask in self.blocked]
+        self.free_count = sum(self.row_free)
+        self.row_max_run = [self._longest_run(self.full_row & ~mask) for mask in self.blocked]
+        self._free_pool = [
+            (row, col) for row in range(self.rows) for col in range(self.cols)
+            if self.grid[row][col] == self.FREE
+        ]
+        self._pool_index = {seat: i for i, seat in enumerate(self._free_pool)}
+
+    @staticmethod
+    def _longest_run(mask):
+        """Length of the longest run of set bits in ``mask``"""
+        length = 0
+        while mask:
+            mask &= mask >> 1
+            length += 1
+        return length
+
+    @property
+    def total_seats(self):
+        return self.rows * self.cols - sum(bin(mask).count("1") for mask in self.blocked)
+
+    def is_wheelchair(self, row, col):
+        return bool(self.wheelchair[row] >> col & 1)
+
+    def is_companion(self, row, col):
+        return bool(self.companion[row] >> col & 1)
+
+    def check_seat(self, row, col, accessible=False):
+        """Return the reason a seat cannot be booked, or None if it can"""
+        bit = 1 << col
+        occupied = self.occupied[row]
+        if self.blocked[row] & bit:
+            return "Seat is blocked"
+        if occupied & bit:
+            return "Seat is already booked"
+        if self.wheelchair[row] & bit and not accessible:
+            return "Seat is a wheelchair space"
+
+        # A companion seat next to a booked wheelchair space belongs to that party
+        companion_of_party = bool(self.companion[row] & bit
+                                  and occupied & self.wheelchair[row] & self.neighbour_masks[col])
+        if self.companion[row] & bit and not (accessible or companion_of_party):
+            return "Seat is reserved for wheelchair companions"
+        if self.distancing and not companion_of_party and occupied & self.neighbour_masks[col]:
+            return "An empty seat must be left between parties"
+        return None
+
+    def book(self, row, col, accessible=False):
+        """Book a single seat and return its order id
+
+        Raises SeatUnavailableError if the rules forbid it.
+        """
+        with self._writing():
+            reason = self.check_seat(row, col, accessible)
+            if reason:
+                raise SeatUnavailableError(reason)
+            return self._create_order([(row, col)])
+
+    def _create_order(self, seats, hold_ttl=None):
+        order_id = self._next_order
+        if self.journal is not None:
+            self.journal.order_created(self.show_id, order_id, seats, hold_ttl)
+        self._next_order += 1
+        self.orders[order_id] = list(seats)
+        self._record_undo(lambda: self.orders.pop(order_id))
+        for row, col in seats:
+            self._occupy(row, col, order_id)
+        return order_id
+
+    def _occupy(self, row, col, order_id):
+        self._mark_changed()
+        self.occupied[row] |= 1 << col
+        self.grid[row][col] = self.BOOKED
+        self.booked_seats[(row, col)] = order_id
+
+        # Swap-remove from the random-pick pool
+        index = self._pool_index.pop((row, col))
+        last = self._free_pool.pop()
+        if index < len(self._free_pool):
+            self._free_pool[index] = last
+            self._pool_index[last] = index
+
+        self._update_row_index(row, -1)
+        self._record_undo(lambda: self._release(row, col))
+
+    def _release(self, row, col):
+        self._mark_changed()
+        self.occupied[row] &= ~(1 << col)
+        self.grid[row][col] = self.FREE
+        order_id = self.booked_seats.pop((row, col))
+
+        self._pool_index[(row, col)] = len(self._free_pool)
+        self._free_pool.append((row, col))
+
+        self._update_row_index(row, 1)
+        self._record_undo(lambda: self._occupy(row, col, order_id))
+
+    def _update_row_index(self, row, delta):
+        self.row_free[row] += delta
+        self.free_count += delta
+        self.row_max_run[row] = self._longest_run(self.full_row & ~(self.occupied[row] | self.blocked[row]))
+
+    def cancel_seat(self, row, col):
+        """Release one booked seat, returning the order it belonged to"""
+        with self._writing():
+            order_id = self.booked_seats.get((row, col))
+            if order_id is None:
+                raise KeyError(f"Seat {(row, col)} is not booked")
+            if self.journal is not None:
+                self.journal.seat_released(self.show_id, row, col)
+            seats = self.orders[order_id]
+            index = seats.index((row, col))
+            del seats[index]
+            self._record_undo(lambda: seats.insert(index, (row, col)))
+            if not seats:
+                del self.orders[order_id]
+                expires_at = self.holds.pop(order_id, None)
+                self._record_undo(lambda: self._restore_order(order_id, seats, expires_at))
+            self._release(row, col)
+            self._serve_waitlist([row])
+            return order_id
+
+    def cancel_order(self, order_id):
+        """Release every seat in an order, returning the released seats"""
+        with self._writing():
+            return self._cancel_order(order_id)
+
+    def _cancel_order(self, order_id):
+        if order_id not in self.orders:
+            raise KeyError(f"Order {order_id} does not exist")
+        if self.journal is not None:
+            self.journal.order_cancelled(self.show_id, order_id)
+        seats = self.orders.pop(order_id)
+        expires_at = self.holds.pop(order_id, None)
+        self._record_undo(lambda: self._restore_order(order_id, seats, expires_at))
+        for row, col in seats:
+            self._release(row, col)
+        self._serve_waitlist(sorted({row for row, _ in seats}))
+        return seats
+
+    def hold_party(self, size, ttl, accessible=False, now=None):
+        """Hold ``size`` adjacent seats for ``ttl`` seconds, returning (order_id, seats) or None"""
+        now = time.monotonic() if now is None else now
+        with self._writing():
+            seats = self.find_party(size, accessible)
+            if not seats:
+                return None
+            order_id = self._create_order(seats, hold_ttl=ttl)
+            self.holds[order_id] = now + ttl
+            self._record_undo(lambda: self.holds.pop(order_id))
+            heapq.heappush(self._hold_expiries, (now + ttl, order_id))
+            return order_id, seats
+
+    def confirm_hold(self, order_id):
+        """Turn a hold into a confirmed booking; raises KeyError if it has expired"""
+        with self._writing():
+            if order_id not in self.holds:
+                raise KeyError(f"Order {order_id} is not held")
+            if self.journal is not None:
+                self.journal.hold_confirmed(self.show_id, order_id)
+            expires_at = self.holds.pop(order_id)
+            self._record_undo(lambda: self.holds.__setitem__(order_id, expires_at))
+
+    def expire_holds(self, now=None):
+        """Release every hold whose time is up, returning the expired order ids"""
+        now = time.monotonic() if now is None else now
+        if not self._hold_expiries or self._hold_expiries[0][0] > now:
+            return []
+        expired = []
+        with self._writing():
+            while self._hold_expiries and self._hold_expiries[0][0] <= now:
+                entry = heapq.heappop(self._hold_expiries)
+                self._record_undo(lambda entry=entry: heapq.heappush(self._hold_expiries, entry))
+                expires_at, order_id = entry
+                if self.holds.get(order_id) == expires_at:
+                    self._cancel_order(order_id)
+                    expired.append(order_id)
+        return expired
+
+    def join_waitlist(self, size, priority=0):
+        """Book ``size`` seats now if possible, otherwise queue the party
+
+        Returns (request_id, order_id): request_id is None when the party was
+        seated straight away, order_id is None while it waits. Parties that
+        queue are seated later through ``on_waitlist_allocated``.
+        """
+        with self._writing():
+            seats = self.find_party(size)
+            if seats:
+                return None, self._create_order(seats)
+            return self.waitlist.add(size, priority), None
+
+    def _serve_waitlist(self, rows):
+        """Allocate freed seats in ``rows`` to the best-fitting waiting parties"""
+        for row in rows:
+            while self.waitlist:
+                run = self._longest_run(self._row_candidates(row, False))
+                request = self.waitlist.pop_best(run)
+                if request is None:
+                    break
+                self._record_undo(lambda request=request: self.waitlist.restore(*request))
+                request_id, size, _ = request
+                seats = self._find_in_row(row, size, False)
+                order_id = self._create_order(seats)
+                if self.on_waitlist_allocated is not None:
+                    self.on_waitlist_allocated(request_id, order_id, seats)
+
+    def restore(self, orders):
+        """Re-create previously confirmed orders, bypassing the booking rules
+
+        ``orders`` maps order id to seats; nothing is written to the journal.
+        Raises ValueError, leaving the map unchanged, if a seat does not exist
+        in this layout or appears twice.
+        """
+        seen = set()
+        for order_id, seats in orders.items():
+            for row, col in seats:
+                if (not (0 <= row < self.rows and 0 <= col < self.cols) or self.blocked[row] >> col & 1
+                        or (row, col) in seen):
+                    raise ValueError(f"Order {order_id} has seat {(row, col)}, which is not bookable in this layout")
+                seen.add((row, col))
+
+        with self._writing():
+            for order_id, seats in orders.items():
+                self.orders[order_id] = list(seats)
+                for row, col in seats:
+                    self._occupy(row, col, order_id)
+                self._next_order = max(self._next_order, order_id + 1)
+
+    def snapshot(self):
+        """Take a consistent AvailabilitySnapshot without blocking writers
+
+        Retries if a write completed (or was in progress) while copying.
+        """
+        while True:
+            start = self.sequence
+            if start & 1:
+                time.sleep(0)
+                continue
+            occupied = tuple(self.occupied)
+            free_count = self.free_count
+            if self.sequence == start:
+                return AvailabilitySnapshot(self.show_id, start >> 1, self.rows, self.cols,
+                                            occupied, tuple(self.blocked), free_count)
+
+    def random_free_seat(self, accessible=False, attempts=8):
+        """Pick a random bookable seat from the free pool, or return None"""
+        for _ in range(min(attempts, len(self._free_pool))):
+            row, col = random.choice(self._free_pool)
+            if self.check_seat(row, col, accessible) is None:
+                return row, col
+
+        # The pool is mostly restricted seats; fall back to filtering it
+        candidates = [seat for seat in self._free_pool if self.check_seat(*seat, accessible) is None]
+        return random.choice(candidates) if candidates else None
+
+    def _row_candidates(self, row, accessible):
+        """Bitmask of seats in a row a new party may take"""
+        occupied = self.occupied[row]
+        free = self.full_row & ~(occupied | self.blocked[row])
+        if not accessible:
+            free &= ~self.restricted[row]
+        if self.distancing:
+            free &= ~((occupied << 1) | (occupied >> 1))
+        return free
+
+    def find_party(self, size, accessible=False):
+        """Find ``size`` adjacent seats in one row, or return None
+
+        Accessible parties must include at least one wheelchair space.
+        """
+        if size < 1 or size > self.cols:
+            return None
+        for row in range(self.rows):
+            if self.row_max_run[row] < size:
+                continue
+            seats = self._find_in_row(row, size, accessible)
+            if seats:
+                return seats
+        return None
+
+    def _find_in_row(self, row, size, accessible):
+        window = (1 << size) - 1
+        # Bit s of ``starts`` is set when seats s..s+size-1 are all free
+        starts = self._row_candidates(row, accessible)
+        for _ in range(size - 1):
+            starts &= starts >> 1
+        while starts:
+            start = (starts & -starts).bit_length() - 1
+            if not accessible or (window << start) & self.wheelchair[row]:
+                return [(row, col) for col in range(start, start + size)]
+            starts &= starts - 1
+        return None
+
+    def book_party(self, size, accessible=False):
+        """Book ``size`` adjacent seats, returning them or None if none fit"""
+        with self._writing():
+            seats = self.find_party(size, accessible)
+            if seats:
+                self._create_order(seats)
+            return seats
+
+
+class AvailabilityCache:
+    """Read path for seat-map browsing
+
+    Serves the cached AvailabilitySnapshot until the seat map's version moves
+    on. Readers take no locks; while a write is in flight they keep getting
+    the previous version.
+    """
+
+    def __init__(self, seat_map):
+        self.seat_map = seat_map
+        self._snapshot = None
+        self.hits = 0
+        self.misses = 0
+
+    def get(self):
+        cached = self._snapshot
+        if cached is not None and cached.version == self.seat_map.version:
+            self.hits += 1
+            return cached
+        self.misses += 1
+        snapshot = self.seat_map.snapshot()
+        self._snapshot = snapshot
+        return snapshot
+
+
+class SQLiteBookingStore:
+    """SQLite persistence for shows, bookings and holds
+
+    Implements the SeatMap journal interface. The database runs in WAL mode
+    with ``synchronous=FULL``, so every committed transaction is durable and
+    readers never block the writer. Connections come from a fixed pool
+    shared by worker threads. Each order is written in one transaction, and
+    ``batch()`` groups many orders into a single commit; the transaction only
+    begins at the first write, so a batch that writes nothing costs nothing.
+    Each show stores its layout and a fingerprint of it; ``add_show``
+    refuses to reopen a show with a different layout, and ``load_layout``
+    rebuilds it without the original file. Statements use fixed SQL text so
+    sqlite3's per-connection statement cache keeps them prepared.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS shows (
+            show_id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            layout TEXT NOT NULL,
+            layout_hash TEXT NOT NULL,
+            created_at REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS bookings (
+            show_id TEXT NOT NULL,
+            seat_row INTEGER NOT NULL,
+            seat_col INTEGER NOT NULL,
+            order_id INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            expires_at REAL,
+            PRIMARY KEY (show_id, seat_row, seat_col)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS bookings_by_order ON bookings (show_id, order_id);
+        CREATE INDEX IF NOT EXISTS bookings_by_status ON bookings (show_id, status, expires_at);
+    """
+
+    INSERT_SHOW = ("INSERT OR IGNORE INTO shows (show_id, name, layout, layout_hash, created_at) "
+                   "VALUES (?, ?, ?, ?, ?)")
+    SELECT_SHOW = "SELECT name, layout, layout_hash FROM shows WHERE show_id = ?"
+    INSERT_SEAT = ("INSERT INTO bookings (show_id, seat_row, seat_col, order_id, status, expires_at) "
+                   "VALUES (?, ?, ?, ?, ?, ?)")
+    DELETE_SEAT = "DELETE FROM bookings WHERE show_id = ? AND seat_row = ? AND seat_col = ?"
+    DELETE_ORDER = "DELETE FROM bookings WHERE show_id = ? AND order_id = ?"
+    DELETE_SHOW = "DELETE FROM bookings WHERE show_id = ?"
+    DELETE_HOLDS = "DELETE FROM bookings WHERE show_id = ? AND status = 'held'"
+    CONFIRM_ORDER = "UPDATE bookings SET status = 'booked', expires_at = NULL WHERE show_id = ? AND order_id = ?"
+    SELECT_ORDERS = ("SELECT order_id, seat_row, seat_col FROM bookings WHERE show_id = ? AND status = 'booked' "
+                     "ORDER BY order_id")
+    SELECT_ORDERS_AND_HOLDS = ("SELECT order_id, seat_row, seat_col FROM bookings WHERE show_id = ? "
+                               "AND (status = 'booked' OR expires_at > ?) ORDER BY order_id")
+    COUNT_STATUS = "SELECT COUNT(*) FROM bookings WHERE show_id = ? AND status = ?"
+
+    def __init__(self, path, pool_size=4):
+        self.path = path
+        self._pool = queue.Queue()
+        self._local = threading.local()
+        for _ in range(pool_size):
+            conn = sqlite3.connect(path, timeout=30, isolation_level=None,
+                                   check_same_thread=False, cached_statements=64)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=FULL")
+            self._pool.put(conn)
+        with self.connection() as conn:
+            conn.executescript(self.SCHEMA)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a pooled connection for the duration of the block
+
+        Inside a transaction on this thread, its connection is used instead,
+        so reads see the pending writes and a one-connection pool cannot
+        deadlock.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            yield conn
+            return
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    @contextmanager
+    def batch(self):
+        """Run every write in the block as one transaction on this thread"""
+        local = self._local
+        depth = getattr(local, "depth", 0)
+        local.depth = depth + 1
+        if depth:
+            try:
+                yield
+            finally:
+                local.depth = depth
+            return
+
+        local.conn = None
+        try:
+            yield
+        except BaseException:
+            if local.conn is not None:
+                local.conn.execute("ROLLBACK")
+            raise
+        else:
+            if local.conn is not None:
+                local.conn.execute("COMMIT")
+        finally:
+            if local.conn is not None:
+                self._pool.put(local.conn)
+                local.conn = None
+            local.depth = 0
+
+    @contextmanager
+    def _write(self):
+        """Yield a connection inside this thread's transaction, starting one if needed"""
+        local = self._local
+        if not getattr(local, "depth", 0):
+            with self.batch(), self._write() as conn:
+                yield conn
+            return
+        if local.conn is None:
+            conn = self._pool.get()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+            except BaseException:
+                self._pool.put(conn)
+                raise
+            local.conn = conn
+        yield local.conn
+
+    def close(self):
+        while not self._pool.empty():
+            self._pool.get().close()
+
+    def add_show(self, show_id, layout):
+        """Register a show, or check that an existing one was saved with the same layout"""
+        fingerprint = layout.fingerprint()
+        spec = json.dumps(layout.to_dict(), sort_keys=True)
+        with self._write() as conn:
+            conn.execute(self.INSERT_SHOW, (show_id, layout.name, spec, fingerprint, time.time()))
+            name, _, saved = conn.execute(self.SELECT_SHOW, (show_id,)).fetchone()
+        if saved != fingerprint:
+            raise ValueError(f"Show {show_id!r} was saved with a different layout ({name!r})")
+
+    def load_layout(self, show_id):
+        """Return the TheaterLayout a show was saved with, or None for an unknown show"""
+        with self.connection() as conn:
+            row = conn.execute(self.SELECT_SHOW, (show_id,)).fetchone()
+        return None if row is None else TheaterLayout.from_dict(json.loads(row[1]))
+
+    # SeatMap journal interface
+
+    def order_created(self, show_id, order_id, seats, hold_ttl=None):
+        status = "booked" if hold_ttl is None else "held"
+        expires_at = None if hold_ttl is None else time.time() + hold_ttl
+        with self._write() as conn:
+            conn.executemany(self.INSERT_SEAT, [
+                (show_id, row, col, order_id, status, expires_at) for row, col in seats
+            ])
+
+    def seat_released(self, show_id, row, col):
+        with self._write() as conn:
+            conn.execute(self.DELETE_SEAT, (show_id, row, col))
+
+    def order_cancelled(self, show_id, order_id):
+        with self._write() as conn:
+            conn.execute(self.DELETE_ORDER, (show_id, order_id))
+
+    def hold_confirmed(self, show_id, order_id):
+        with self._write() as conn:
+            conn.execute(self.CONFIRM_ORDER, (show_id, order_id))
+
+    def show_reset(self, show_id):
+        with self._write() as conn:
+            conn.execute(self.DELETE_SHOW, (show_id,))
+
+    # Queries
+
+    def load_orders(self, show_id, include_held=False):
+        """Return confirmed orders as {order_id: seats}
+
+        With ``include_held``, unexpired holds are returned as well, giving
+        every seat that is currently taken. Nothing is modified.
+        """
+        if include_held:
+            query, params = self.SELECT_ORDERS_AND_HOLDS, (show_id, time.time())
+        else:
+            query, params = self.SELECT_ORDERS, (show_id,)
+        orders = {}
+        with self.connection() as conn:
+            for order_id, row, col in conn.execute(query, params):
+                orders.setdefault(order_id, []).append((row, col))
+        return orders
+
+    def purge_holds(self, show_id):
+        """Delete unconfirmed holds, e.g. ones left over from a previous run; returns the seat count"""
+        with self._write() as conn:
+            return conn.execute(self.DELETE_HOLDS, (show_id,)).rowcount
+
+    def count(self, show_id, status="booked"):
+        with self.connection() as conn:
+            return conn.execute(self.COUNT_STATUS, (show_id, status)).fetchone()[0]
+
+
+class TokenBucket:
+    """Classic token bucket: ``rate`` tokens per second, holding at most ``burst``"""
+
+    def __init__(self, rate, burst, now):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.last = now
+
+    def take(self, now):
+        """Take one token if available"""
+        self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class _ShowGate:
+    """Admission state for one show"""
+
+    def __init__(self, rate, burst, now):
+        self.lock = threading.Lock()
+        self.bucket = TokenBucket(rate, burst, now)
+        self.sessions = {}
+        self.session_expiries = deque()
+        # Time each session's client first called request(), for latency
+        self.arrivals = {}
+        # Queued (ticket, arrival time) pairs, in FIFO order
+        self.queue = deque()
+        # Live tickets: None while queued, the session id once admitted
+        self.tickets = {}
+        # Session id -> ticket, for admitted tickets not yet collected by poll
+        self.session_tickets = {}
+        # Sorted tickets abandoned while still in the queue
+        self.abandoned = []
+        self.next_ticket = 1
+        self.counts = {AdmissionController.ADMITTED: 0, AdmissionController.QUEUED: 0,
+                       AdmissionController.REJECTED: 0}
+
+
+class AdmissionController:
+    """Rate limiting and fair virtual queueing in front of the booking engine
+
+    Each show gets a token bucket that paces admissions. A cap on concurrent
+    checkout sessions bounds how many clients contend for the seat map's
+    write lock, which in turn bounds booking latency. Clients beyond the cap
+    wait in a FIFO virtual queue. Arrivals whose estimated wait
+    (queue length / rate) exceeds ``max_wait`` are shed at once, at O(1)
+    cost, before any booking work.
+
+    Checkout latency is measured from a client's first ``request`` to the
+    end of its ``checkout``, so it includes time spent queueing. Only the
+    most recent ``latency_samples`` checkouts are kept.
+    """
+
+    ADMITTED = "admitted"
+    QUEUED = "queued"
+    REJECTED = "rejected"
+
+    def __init__(self, rate=50.0, burst=20, max_sessions=100, max_wait=120.0, session_ttl=300.0,
+                 latency_samples=10000, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.max_sessions = max_sessions
+        self.max_wait = max_wait
+        self.session_ttl = session_ttl
+        self.clock = clock
+        self._gates = {}
+        self._gates_lock = threading.Lock()
+        self._session_ids = itertools.count(1)
+        self.latencies = deque(maxlen=latency_samples)
+
+    @property
+    def counts(self):
+        """Requests admitted, queued and rejected, summed over all shows"""
+        totals = {self.ADMITTED: 0, self.QUEUED: 0, self.REJECTED: 0}
+        for gate in list(self._gates.values()):
+            with gate.lock:
+                for status, count in gate.counts.items():
+                    totals[status] += count
+        return totals
+
+    def _gate(self, show_id):
+        gate = self._gates.get(show_id)
+        if gate is None:
+            with self._gates_lock:
+                gate = self._gates.setdefault(show_id, _ShowGate(self.rate, self.burst, self.clock()))
+        return gate
+
+    def _expire_sessions(self, gate, now):
+        while gate.session_expiries and gate.session_expiries[0][0] <= now:
+            expires_at, session_id = gate.session_expiries.popleft()
+            if gate.sessions.get(session_id) == expires_at:
+                del gate.sessions[session_id]
+                gate.arrivals.pop(session_id, None)
+                self._drop_ticket(gate, session_id)
+
+    def _drop_ticket(self, gate, session_id):
+        """Forget the uncollected ticket of a session that has ended"""
+        ticket = gate.session_tickets.pop(session_id, None)
+        if ticket is not None:
+            gate.tickets.pop(ticket, None)
+
+    def _admit(self, gate, now, arrived_at):
+        session_id = next(self._session_ids)
+        expires_at = now + self.session_ttl
+        gate.sessions[session_id] = expires_at
+        gate.session_expiries.append((expires_at, session_id))
+        gate.arrivals[session_id] = arrived_at
+        return session_id
+
+    def _promote(self, gate, now):
+        """Admit queued tickets from the head while sessions and tokens allow"""
+        while gate.queue and len(gate.sessions) < self.max_sessions:
+            ticket, arrived_at = gate.queue[0]
+            if ticket not in gate.tickets:
+                gate.queue.popleft()
+                del gate.abandoned[0]
+                continue
+            if not gate.bucket.take(now):
+                break
+            gate.queue.popleft()
+            session_id = self._admit(gate, now, arrived_at)
+            gate.tickets[ticket] = session_id
+            gate.session_tickets[session_id] = ticket
+
+    def request(self, show_id):
+        """Ask to start a checkout session
+
+        Returns (status, token): a session id when admitted, a ticket to
+        poll when queued, or None when rejected.
+        """
+        gate = self._gate(show_id)
+        now = self.clock()
+        with gate.lock:
+            self._expire_sessions(gate, now)
+            self._promote(gate, now)
+            if not gate.queue and len(gate.sessions) < self.max_sessions and gate.bucket.take(now):
+                gate.counts[self.ADMITTED] += 1
+                return self.ADMITTED, self._admit(gate, now, now)
+            if len(gate.queue) / self.rate > self.max_wait:
+                gate.counts[self.REJECTED] += 1
+                return self.REJECTED, None
+            ticket = gate.next_ticket
+            gate.next_ticket += 1
+            gate.queue.append((ticket, now))
+            gate.tickets[ticket] = None
+            gate.counts[self.QUEUED] += 1
+            return self.QUEUED, ticket
+
+    def poll(self, show_id, ticket):
+        """Check a queued ticket
+
+        Returns (status, session_id, position): the session id once admitted,
+        the 1-based queue position among live tickets while still queued, and
+        None for whichever does not apply. Unknown and abandoned tickets are
+        rejected, as are admitted tickets whose session expired before they
+        were collected. Keep polling with the same ticket until it is admitted.
+        """
+        gate = self._gate(show_id)
+        now = self.clock()
+        with gate.lock:
+            self._expire_sessions(gate, now)
+            self._promote(gate, now)
+            if ticket not in gate.tickets:
+                return self.REJECTED, None, None
+            session_id = gate.tickets[ticket]
+            if session_id is not None:
+                del gate.tickets[ticket]
+                del gate.session_tickets[session_id]
+                return self.ADMITTED, session_id, None
+            # Tickets are queued in order, so subtract the abandoned ones in between
+            head = gate.queue[0][0]
+            skipped = bisect.bisect_left(gate.abandoned, ticket) - bisect.bisect_left(gate.abandoned, head)
+            return self.QUEUED, None, ticket - head + 1 - skipped
+
+    def abandon(self, show_id, ticket):
+        """Leave the virtual queue; the entry is skipped lazily
+
+        A ticket that was admitted but never collected gives its session back.
+        """
+        gate = self._gate(show_id)
+        with gate.lock:
+            if ticket not in gate.tickets:
+                return
+            session_id = gate.tickets.pop(ticket)
+            if session_id is None:
+                bisect.insort(gate.abandoned, ticket)
+        if session_id is not None:
+            self.release(show_id, session_id)
+
+    def release(self, show_id, session_id):
+        """End a checkout session and admit the next queued client"""
+        self._end_session(self._gate(show_id), session_id)
+
+    def _end_session(self, gate, session_id, checked_out=False):
+        now = self.clock()
+        with gate.lock:
+            gate.sessions.pop(session_id, None)
+            self._drop_ticket(gate, session_id)
+            arrived_at = gate.arrivals.pop(session_id, None)
+            if checked_out and arrived_at is not None:
+                self.latencies.append((now - arrived_at) * 1000)
+            self._promote(gate, now)
+
+    def checkout(self, seat_map, session_id, size=1, accessible=False):
+        """Book a party for an admitted session, then end the session
+
+        Raises PermissionError if the session is unknown or has expired.
+        """
+        gate = self._gate(seat_map.show_id)
+        with gate.lock:
+            self._expire_sessions(gate, self.clock())
+            if session_id not in gate.sessions:
+                raise PermissionError(f"Session {session_id} is not admitted for show {seat_map.show_id!r}")
+        try:
+            return seat_map.book_party(size, accessible)
+        finally:
+            self._end_session(gate, session_id, checked_out=True)
+
+    def latency_summary(self):
+        """Return p50/p99/max checkout latency in milliseconds over the retained samples"""
+        if not self.latencies:
+            return {"checkouts": 0, "p50_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+        ordered = sorted(self.latencies)
+        return {
+            "checkouts": len(ordered),
+            "p50_ms": ordered[len(ordered) // 2],
+            "p99_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))],
+            "max_ms": ordered[-1]
+        }
+
+
+def benchmark_admission(layout=None, clients=20000, threads=16, **controller_options):
+    """Simulate an on-sale spike: many clients racing for one show through an AdmissionController
+
+    Clients book parties of 1-4. Without a layout, a hall of 100-seat rows
+    with room for the average demand is generated, so latency is measured
+    on a show that stays open rather than one that sells out at once.
+    """
+    if layout is None:
+        rows = -(-clients * 5 // 2 // 100)
+        layout = TheaterLayout.from_dict({
+            "name": "Arena", "rows": [{"label": str(row), "seats": 100} for row in range(1, rows + 1)]
+        })
+    seat_map = SeatMap.from_layout(layout, show_id="premiere")
+    controller = AdmissionController(**controller_options)
+    remaining = itertools.count()
+    outcomes = {"booked": 0, "sold_out": 0, "shed": 0}
+    outcomes_lock = threading.Lock()
+
+    def client():
+        while next(remaining) < clients:
+            status, token = controller.request(seat_map.show_id)
+            if status == AdmissionController.QUEUED:
+                ticket = token
+                while status == AdmissionController.QUEUED:
+                    time.sleep(0.001)
+                    status, token, _ = controller.poll(seat_map.show_id, ticket)
+            if status == AdmissionController.REJECTED:
+                outcome = "shed"
+            else:
+                outcome = "booked" if controller.checkout(seat_map, token, random.randint(1, 4)) else "sold_out"
+            with outcomes_lock:
+                outcomes[outcome] += 1
+
+    workers = [threading.Thread(target=client) for _ in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    outcomes["elapsed_s"] = time.perf_counter() - start
+    outcomes.update(controller.latency_summary())
+    return outcomes
+
+
+class SeatMapRenderer:
+    """Headless SVG/PNG/HTML seat-map renderer with a per-version render cache
+
+    Renders are cached per (show, version, format). For each show and format
+    the renderer also keeps the last rendered state. A new version only
+    redraws the seats whose row bits changed since then, not the whole hall.
+    """
+
+    COLORS = {
+        "background": "#0a0a1a",
+        "screen": "#f1c40f",
+        "free": "#2ecc71",
+        "booked": "#e74c3c",
+        "wheelchair": "#1abc9c",
+        "blocked": "#7f8c8d"
+    }
+    FORMATS = ("svg", "png", "html")
+
+    def __init__(self, layout, seat_size=32, gap=6, cache_size=64):
+        self.layout = layout
+        self.seat_size = seat_size
+        self.gap = gap
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._bases = {}
+        self._lock = threading.Lock()
+        self._wheelchair = set(layout.wheelchair)
+        self.renders = 0
+        self.seats_drawn = 0
+
+        # Seat geometry, including the vertical displacement of curved rows.
+        # A positive curve bows a row's ends towards the screen and a negative
+        # one away from it, so the canvas is grown by the largest bend each way.
+        pitch = seat_size + gap
+        mid = (layout.cols - 1) / 2
+        bend_up = int(max(0.0, *layout.row_curves) * seat_size)
+        bend_down = int(-min(0.0, *layout.row_curves) * seat_size)
+        self.padding = pitch
+        self.screen_height = pitch
+        self.positions = {}
+        for row, col in layout.seats:
+            bend = layout.row_curves[row] * seat_size * ((col - mid) / mid) ** 2 if mid else 0.0
+            self.positions[(row, col)] = (
+                self.padding + col * pitch,
+                self.padding + self.screen_height + bend_up + row * pitch - int(bend)
+            )
+        self.width = self.padding * 2 + layout.cols * pitch
+        self.height = self.padding * 2 + self.screen_height + bend_up + bend_down + layout.rows * pitch
+
+    def render(self, snapshot, fmt="svg"):
+        """Return the rendered seat map for an AvailabilitySnapshot (str for svg/html, bytes for png)"""
+        if fmt not in self.FORMATS:
+            raise ValueError(f"Unknown format {fmt!r}; expected one of {', '.join(self.FORMATS)}")
+        key = (snapshot.show_id, snapshot.version, fmt)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+
+            if fmt == "html":
+                output = self._html(snapshot, self._render_svg(snapshot))
+            elif fmt == "svg":
+                output = self._render_svg(snapshot)
+            else:
+                output = self._render_png(snapshot)
+
+            self.renders += 1
+            self._cache[key] = output
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            return output
+
+    def _seat_state(self, snapshot, row, col):
+        if snapshot.blocked[row] >> col & 1:
+            return "blocked"
+        if snapshot.occupied[row] >> col & 1:
+            return "booked"
+        if (row, col) in self._wheelchair:
+            return "wheelchair"
+        return "free"
+
+    def _changed_seats(self, base_snapshot, snapshot):
+        """Seats whose state differs between two snapshots, found by XOR-ing row masks"""
+        if base_snapshot is None:
+            return self.layout.seats
+        changed = []
+        for row, (old, new) in enumerate(zip(base_snapshot.occupied, snapshot.occupied)):
+            diff = old ^ new
+            while diff:
+                col = (diff & -diff).bit_length() - 1
+                changed.append((row, col))
+                diff &= diff - 1
+        return changed
+
+    def _base(self, snapshot, fmt):
+        """Return the last rendered (snapshot, state) for this show and format"""
+        return self._bases.get((snapshot.show_id, fmt), (None, None))
+
+    def _svg_seat(self, snapshot, row, col):
+        x, y = self.positions[(row, col)]
+        state = self._seat_state(snapshot, row, col)
+        size = self.seat_size
+        return (f'<g class="seat {state}"><rect x="{x}" y="{y}" width="{size}" height="{size}" rx="4" '
+                f'fill="{self.COLORS[state]}"/><text x="{x + size // 2}" y="{y + size // 2 + 4}" '
+                f'text-anchor="middle" font-size="{size // 3}" fill="#ffffff">'
+                f'{escape(self.layout.seat_name(row, col))}</text></g>')
+
+    def _render_svg(self, snapshot):
+        cached = self._cache.get((snapshot.show_id, snapshot.version, "svg"))
+        if cached is not None:
+            return cached
+        base_snapshot, fragments = self._base(snapshot, "svg")
+        fragments = dict(fragments or {})
+        changed = self._changed_seats(base_snapshot, snapshot)
+        for row, col in changed:
+            fragments[(row, col)] = self._svg_seat(snapshot, row, col)
+        self.seats_drawn += len(changed)
+        self._bases[(snapshot.show_id, "svg")] = (snapshot, fragments)
+
+        screen_x = self.padding
+        screen_w = self.width - 2 * self.padding
+        parts = [
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{self.width}" height="{self.height}" '
+            f'viewBox="0 0 {self.width} {self.height}" font-family="Helvetica, sans-serif">',
+            f'<rect width="100%" height="100%" fill="{self.COLORS["background"]}"/>',
+            f'<rect x="{screen_x}" y="{self.padding // 2}" width="{screen_w}" height="{self.seat_size // 3}" '
+            f'fill="{self.COLORS["screen"]}"/>'
+        ]
+        parts.extend(fragments[seat] for seat in self.layout.seats)
+        parts.append("</svg>")
+        return "".join(parts)
+
+    def _render_png(self, snapshot):
+        base_snapshot, pixels = self._base(snapshot, "png")
+        stride = 1 + self.width * 3
+        if pixels is None:
+            background = bytes.fromhex(self.COLORS["background"][1:])
+            pixels = bytearray((b"\x00" + background * self.width) * self.height)
+            screen = bytes.fromhex(self.COLORS["screen"][1:])
+            for y in range(self.padding // 2, self.padding // 2 + self.seat_size // 3):
+                start = y * stride + 1 + self.padding * 3
+                pixels[start:start + (self.width - 2 * self.padding) * 3] = screen * (self.width - 2 * self.padding)
+        else:
+            pixels = bytearray(pixels)
+
+        changed = self._changed_seats(base_snapshot, snapshot)
+        size = self.seat_size
+        for row, col in changed:
+            x, y = self.positions[(row, col)]
+            color = bytes.fromhex(self.COLORS[self._seat_state(snapshot, row, col)][1:]) * size
+            for line in range(y, y + size):
+                start = line * stride + 1 + x * 3
+                pixels[start:start + size * 3] = color
+        self.seats_drawn += len(changed)
+        self._bases[(snapshot.show_id, "png")] = (snapshot, pixels)
+
+        def chunk(tag, data):
+            return (struct.pack(">I", len(data)) + tag + data
+                    + struct.pack(">I", zlib.crc32(tag + data) & 0xffffffff))
+
+        header = struct.pack(">IIBBBBB", self.width, self.height, 8, 2, 0, 0, 0)
+        return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header)
+                + chunk(b"IDAT", zlib.compress(bytes(pixels), 6)) + chunk(b"IEND", b""))
+
+    def _html(self, snapshot, svg):
+        booked = sum(bin(mask).count("1") for mask in snapshot.occupied)
+        legend = "".join(
+            f'<span style="margin:0 12px"><span style="display:inline-block;width:14px;height:14px;'
+            f'background:{self.COLORS[state]}"></span> {state.title()}</span>'
+            for state in ("free", "booked", "wheelchair", "blocked")
+        )
+        return (
+            '<!DOCTYPE html><html><head><meta charset="utf-8"><meta http-equiv="refresh" content="5">'
+            f'<title>{escape(self.layout.name)} - Seat Map</title></head>'
+            f'<body style="background:{self.COLORS["background"]};color:#ecf0f1;font-family:Helvetica,sans-serif;'
+            'text-align:center">'
+            f'<h1>{escape(self.layout.name)}</h1>{svg}'
+            f'<p>{legend}</p><p>{snapshot.free_count} available &middot; {booked} booked '
+            f'&middot; version {snapshot.version}</p></body></html>'
+        )
+
+
+def benchmark_store(path, workers=4, bookings=4000, batch_size=1, seats_per_order=1):
+    """Measure sustained bookings/sec against a SQLiteBookingStore
+
+    Each worker thread books into its own show, committing ``batch_size``
+    orders per transaction. Returns bookings (seats) per second.
+    """
+    store = SQLiteBookingStore(path, pool_size=workers)
+    per_worker = bookings // workers
+
+    def worker(index):
+        show_id = f"bench-{index}-{batch_size}"
+        store.show_reset(show_id)
+        order_id = 0
+        for start in range(0, per_worker, batch_size * seats_per_order):
+            with store.batch():
+                for first in range(start, min(start + batch_size * seats_per_order, per_worker), seats_per_order):
+                    order_id += 1
+                    seats = [(n // 100, n % 100) for n in range(first, min(first + seats_per_order, per_worker))]
+                    store.order_created(show_id, order_id, seats)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(workers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    store.close()
+    return per_worker * workers / elapsed
+
+
+class UIScheduler:
+    """Coalesces UI refresh work into at most one Tk update per frame
+
+    Callbacks are keyed, so scheduling ``"statistics"`` ten times before the
+    next frame runs the refresh once. With ``enabled=False`` callbacks run
+    immediately, which is useful for measuring the uncoalesced behaviour.
+    """
+
+    def __init__(self, root, fps=60, enabled=True):
+        self.root = root
+        self.frame_ms = max(1, int(1000 / fps))
+        self.enabled = enabled
+        self._pending = {}
+        self._job = None
+        self._last_frame = 0.0
+        self.frames = 0
+        self.requests = 0
+
+    def schedule(self, key, callback):
+        """Run ``callback`` on the next frame, replacing any pending work with the same key"""
+        self.requests += 1
+        if not self.enabled:
+            callback()
+            return
+        self._pending[key] = callback
+        if self._job is None:
+            elapsed_ms = (time.perf_counter() - self._last_frame) * 1000
+            delay = max(0, int(self.frame_ms - elapsed_ms))
+            self._job = self.root.after(delay, self._run_frame)
+
+    def _run_frame(self):
+        self._job = None
+        self._last_frame = time.perf_counter()
+        self.frames += 1
+        pending, self._pending = self._pending, {}
+        for callback in pending.values():
+            callback()
+
+    def flush(self):
+        """Run all pending work now"""
+        if self._job is not None:
+            self.root.after_cancel(self._job)
+            self._run_frame()
+
+
+class LagMonitor:
+    """Measures Tk event-loop lag by timing how late a periodic ``after`` job fires"""
+
+    def __init__(self, root, interval_ms=50):
+        self.root = root
+        self.interval_ms = interval_ms
+        self.samples = []
+        self._job = None
+        self._expected = 0.0
+
+    def start(self):
+        self._expected = time.perf_counter() + self.interval_ms / 1000
+        self._job = self.root.after(self.interval_ms, self._tick)
+
+    def stop(self):
+        if self._job is not None:
+            self.root.after_cancel(self._job)
+            self._job = None
+
+    def _tick(self):
+        now = time.perf_counter()
+        self.samples.append(max(0.0, (now - self._expected) * 1000))
+        self._expected = now + self.interval_ms / 1000
+        self._job = self.root.after(self.interval_ms, self._tick)
+
+    def summary(self):
+        """Return mean, p95 and max lag in milliseconds"""
+        if not self.samples:
+            return {"samples": 0, "mean_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+        ordered = sorted(self.samples)
+        return {
+            "samples": len(ordered),
+            "mean_ms": sum(ordered) / len(ordered),
+            "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+            "max_ms": ordered[-1]
+        }
+
+
+class CallbackProfiler:
+    """Opt-in profiler for Tk callbacks
+
+    While installed, every callback Tk registers goes through a timing
+    wrapper: ``bind`` handlers, widget ``command`` callbacks and ``after``
+    jobs. The profiler records wall time and call counts and flags callbacks
+    that block the main loop for longer than ``frame_budget_ms``. Selected
+    methods can also be wrapped so they show up as nested frames. ``dump``
+    writes collapsed stacks ("a;b;c microseconds") for flamegraph.pl or
+    speedscope.
+    """
+
+    PROFILED_METHODS = (
+        "create_gui",
+        "create_seat_grid",
+        "create_controls_panel",
+        "create_statistics_panel",
+        "initialize_demo_bookings",
+        "select_seat",
+        "on_seat_hover",
+        "on_row_change",
+        "on_seat_change",
+        "book_seat",
+        "book_random_seat",
+        "cancel_seat_manual",
+        "update_seat_display",
+        "_repaint_seats",
+        "_refresh_statistics",
+        "_apply_resize"
+    )
+
+    def __init__(self, frame_budget_ms=16.7):
+        self.frame_budget_ms = frame_budget_ms
+        self.stats = {}
+        self.stacks = {}
+        self.slow_calls = []
+        self._stack = []
+        self._patched = []
+
+    def install(self, app_class=None):
+        """Start profiling Tk callbacks (and ``app_class``'s PROFILED_METHODS)"""
+        profiler = self
+
+        class ProfiledCallWrapper(tk.CallWrapper):
+            def __call__(self, *args):
+                with profiler.measure(profiler.callback_name(self.func, self.subst)):
+                    return super().__call__(*args)
+
+        self._patched.append((tk, "CallWrapper", tk.CallWrapper))
+        tk.CallWrapper = ProfiledCallWrapper
+
+        if app_class is not None:
+            for name in self.PROFILED_METHODS:
+                method = getattr(app_class, name)
+                self._patched.append((app_class, name, method))
+                setattr(app_class, name, self.wrap(method, f"{app_class.__name__}.{name}"))
+
+    def uninstall(self):
+        while self._patched:
+            owner, name, original = self._patched.pop()
+            setattr(owner, name, original)
+
+    def wrap(self, func, name):
+        def profiled(*args, **kwargs):
+            with self.measure(name):
+                return func(*args, **kwargs)
+        profiled.__name__ = func.__name__
+        profiled.__qualname__ = func.__qualname__
+        return profiled
+
+    @staticmethod
+    def callback_name(func, subst=None):
+        """Readable name for a registered callback, unwrapping after() jobs"""
+        kind = "bind" if subst else "command"
+        code = getattr(func, "__code__", None)
+        if code is not None and code.co_name == "callit" and func.__closure__:
+            # Misc.after wraps the job in a closure; profile the real function
+            cells = dict(zip(code.co_freevars, (cell.cell_contents for cell in func.__closure__)))
+            if "func" in cells:
+                kind, func = "after", cells["func"]
+                code = getattr(func, "__code__", None)
+        name = getattr(func, "__qualname__", type(func).__name__)
+        if code is not None and name.endswith("<lambda>"):
+            name = f"{name}:{code.co_firstlineno}"
+        return f"{kind} {name}"
+
+    @contextmanager
+    def measure(self, name):
+        """Time a block as a frame called ``name``, nested under any enclosing frame"""
+        frame = [name, 0.0]
+        self._stack.append(frame)
+        path = ";".join(entry[0] for entry in self._stack)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self._stack.pop()
+            if self._stack:
+                self._stack[-1][1] += elapsed
+
+            calls, total, longest = self.stats.get(name, (0, 0.0, 0.0))
+            self.stats[name] = (calls + 1, total + elapsed, max(longest, elapsed))
+            self.stacks[path] = self.stacks.get(path, 0.0) + elapsed - frame[1]
+
+            elapsed_ms = elapsed * 1000
+            if not self._stack and elapsed_ms > self.frame_budget_ms:
+                self.slow_calls.append((name, elapsed_ms))
+                print(f"[profile] {name} blocked the main loop for {elapsed_ms:.1f} ms "
+                      f"(budget {self.frame_budget_ms:.1f} ms)", file=sys.stderr)
+
+    def summary(self, limit=20):
+        """Return the most expensive frames by total time, one line each"""
+        lines = [f"{'callback':<60} {'calls':>7} {'total ms':>10} {'mean ms':>9} {'max ms':>9}"]
+        ranked = sorted(self.stats.items(), key=lambda item: item[1][1], reverse=True)
+        for name, (calls, total, longest) in ranked[:limit]:
+            lines.append(f"{name[:60]:<60} {calls:>7} {total * 1000:>10.2f} "
+                         f"{total * 1000 / calls:>9.3f} {longest * 1000:>9.2f}")
+        lines.append(f"{len(self.slow_calls)} callbacks exceeded the {self.frame_budget_ms:.1f} ms frame budget")
+        return "\n".join(lines)
+
+    def dump(self, path):
+        """Write collapsed stacks (self time in microseconds) for flame-graph tools"""
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, seconds in sorted(self.stacks.items()):
+                f.write(f"{stack.replace(' ', '_')} {max(1, int(seconds * 1e6))}\n")
+
 
 class MovieTheaterSeatBooking:
-    def __init__(self, root):
+    def __init__(self, root, layout=None, coalesce_updates=True, recorder=None, store=None, show_id="main",
+                 dialogs=messagebox):
         self.root = root
         self.root.title("Movie Theater Seat Booking System")
         
         # Start in full screen mode
-        self.root.state('zoomed')  # Start maximized on Windows
-        # For Linux/Mac, use: self.root.attributes('-zoomed', True)
+        try:
+            self.root.state('zoomed')  # Start maximized on Windows
+        except tk.TclError:
+            self.root.attributes('-zoomed', True)  # Linux/Mac
         
         self.root.configure(bg="#0a0a1a")
         
-        # Initialize seat grid (5x5)
-        self.seat_grid = [[0 for _ in range(5)] for _ in range(5)]
-        
-        # Track booked seats
-        self.booked_seats = []
+        # Initialize seat map from the auditorium layout (5x5 A-E by default)
+        self.layout = layout or TheaterLayout.default()
+        self.seat_map = SeatMap.from_layout(self.layout, show_id=show_id)
+        self.store = store
         
         # Track selected seat
         self.selected_seat = None
         
+        # Dialogs go through this object so sessions can be replayed headless
+        self.dialogs = dialogs
+        
+        # Session recording must wrap the handlers before widgets bind them
+        if recorder is not None:
+            recorder.attach(self)
+        
+        # Frame-rate-limited scheduler for statistics, resize and repaint work
+        self.ui_scheduler = UIScheduler(root, enabled=coalesce_updates)
+        self._stats_cache = {}
+        
         # Setup colors and fonts
         self.setup_styles()
         
         # Create GUI
         self.create_gui()
         
-        # Initialize with some random booked seats for demo
-        self.initialize_demo_bookings()
+        # Restore saved bookings, or start with some random booked seats for demo
+        if self.store is not None:
+            self.load_saved_bookings()
+        else:
+            self.initialize_demo_bookings()
+        
+        # Waitlisted parties are seated automatically as seats free up
+        self.seat_map.on_waitlist_allocated = self.on_waitlist_allocated
+        self.root.after(1000, self.expire_holds_tick)
         
         # Bind window resize event
         self.root.bind('<Configure>', self.on_window_resize)
         
+    @property
+    def seat_grid(self):
+        return self.seat_map.grid
+    
+    @property
+    def booked_seats(self):
+        return self.seat_map.booked_seats
+    
     def setup_styles(self):
         """Setup color schemes and fonts"""
         # Color scheme
@@ -44,6 +1729,8 @@ class MovieTheaterSeatBooking:
         self.seat_booked = "#e74c3c"
         self.seat_selected = "#3498db"
         self.seat_hover = "#f39c12"
+        self.seat_wheelchair = "#1abc9c"
+        self.seat_blocked = "#7f8c8d"
         self.text_color = "#ecf0f1"
         self.accent_color = "#9b59b6"
         
@@ -119,7 +1806,7 @@ class MovieTheaterSeatBooking:
         self.screen_label.pack(fill=tk.X, pady=10, padx=10)
         
     def create_seat_grid(self):
-        """Create the 5x5 seat grid"""
+        """Create the seat grid for the layout"""
         # Container for the grid
         grid_container = tk.Frame(self.left_frame, bg=self.bg_color)
         grid_container.pack(expand=True, fill=tk.BOTH, pady=(0, 30))
@@ -129,16 +1816,19 @@ class MovieTheaterSeatBooking:
                               highlightthickness=2, highlightcolor="#34495e")
         grid_frame.pack(expand=True)
         
-        # Configure grid for 5x5 seats
-        for i in range(6):  # 5 seats + 1 for row labels
+        # Configure grid for the layout's seats
+        for i in range(self.layout.rows + 1):  # seat rows + 1 for column headers
             grid_frame.grid_rowconfigure(i, weight=1)
+        for i in range(self.layout.cols + 1):  # seats + 1 for row labels
             grid_frame.grid_columnconfigure(i, weight=1)
         
-        # Create column headers (1-5)
-        for col in range(5):
+        # Create column headers where all rows share a seat label
+        for col, seat_label in enumerate(self.layout.column_labels):
+            if seat_label is None:
+                continue
             col_label = tk.Label(
                 grid_frame,
-                text=f"SEAT {col+1}",
+                text=f"SEAT {seat_label}",
                 font=("Helvetica", 14, "bold"),
                 bg=self.bg_color,
                 fg=self.text_color,
@@ -147,14 +1837,14 @@ class MovieTheaterSeatBooking:
             )
             col_label.grid(row=0, column=col+1, sticky="nsew")
         
-        # Create row labels (A-E) and seat buttons
-        self.seat_buttons = [[None for _ in range(5)] for _ in range(5)]
+        # Create row labels and seat buttons (None for aisles and gaps)
+        self.seat_buttons = [[None for _ in range(self.layout.cols)] for _ in range(self.layout.rows)]
         
-        for row in range(5):
+        for row in range(self.layout.rows):
             # Row label
             row_label = tk.Label(
                 grid_frame,
-                text=f"ROW {chr(65+row)}",
+                text=f"ROW {self.layout.row_labels[row]}",
                 font=("Helvetica", 14, "bold"),
                 bg=self.bg_color,
                 fg=self.text_color,
@@ -164,15 +1854,22 @@ class MovieTheaterSeatBooking:
             row_label.grid(row=row+1, column=0, sticky="nsew")
             
             # Seat buttons for this row
-            for col in range(5):
+            for col in range(self.layout.cols):
+                if not self.layout.is_seat(row, col):
+                    continue
+                
                 seat_frame = tk.Frame(grid_frame, bg=self.bg_color)
                 seat_frame.grid(row=row+1, column=col+1, padx=10, pady=10, sticky="nsew")
                 
+                seat_text = self.layout.seat_name(row, col)
+                if self.seat_map.is_wheelchair(row, col):
+                    seat_text = f"♿{seat_text}"
+                
                 btn = tk.Button(
                     seat_frame,
-                    text=f"{chr(65+row)}{col+1}",
+                    text=seat_text,
                     font=("Helvetica", 16, "bold"),
-                    bg=self.seat_empty,
+                    bg=self.get_seat_color(row, col),
                     fg="white",
                     activebackground=self.seat_hover,
                     activeforeground="white",
@@ -213,7 +1910,9 @@ class MovieTheaterSeatBooking:
             ("Available", self.seat_empty),
             ("Booked", self.seat_booked),
             ("Selected", self.seat_selected),
-            ("Hover", self.seat_hover)
+            ("Hover", self.seat_hover),
+            ("Wheelchair", self.seat_wheelchair),
+            ("Blocked", self.seat_blocked)
         ]
         
         for text, color in legend_items:
@@ -275,12 +1974,12 @@ class MovieTheaterSeatBooking:
         )
         row_label.pack(fill=tk.X, pady=(0, 10))
         
-        self.row_var = tk.StringVar(value="A")
+        self.row_var = tk.StringVar(value=self.layout.row_labels[0])
         row_buttons_frame = tk.Frame(row_frame, bg=self.bg_color)
         row_buttons_frame.pack(fill=tk.X)
         
-        # Row selection buttons (A-E)
-        for row_char in ["A", "B", "C", "D", "E"]:
+        # Row selection buttons, ten to a line
+        for index, row_char in enumerate(self.layout.row_labels):
             btn = tk.Radiobutton(
                 row_buttons_frame,
                 text=row_char,
@@ -295,7 +1994,7 @@ class MovieTheaterSeatBooking:
                 height=2,
                 command=lambda rc=row_char: self.on_row_change(rc)
             )
-            btn.pack(side=tk.LEFT, padx=2)
+            btn.grid(row=index // 10, column=index % 10, padx=2, pady=2)
         
         # Seat number selection
         seat_frame = tk.Frame(controls_frame, bg=self.bg_color)
@@ -311,27 +2010,44 @@ class MovieTheaterSeatBooking:
         )
         seat_label.pack(fill=tk.X, pady=(0, 10))
         
-        self.seat_var = tk.IntVar(value=1)
-        seat_buttons_frame = tk.Frame(seat_frame, bg=self.bg_color)
-        seat_buttons_frame.pack(fill=tk.X)
-        
-        # Seat number buttons (1-5)
-        for seat_num in [1, 2, 3, 4, 5]:
-            btn = tk.Radiobutton(
-                seat_buttons_frame,
-                text=str(seat_num),
-                variable=self.seat_var,
-                value=seat_num,
-                font=("Helvetica", 16, "bold"),
-                bg=self.bg_color,
-                fg=self.text_color,
-                selectcolor=self.accent_color,
-                indicatoron=0,
-                width=4,
-                height=2,
-                command=lambda sn=seat_num: self.on_seat_change(sn)
-            )
-            btn.pack(side=tk.LEFT, padx=2)
+        self.seat_var = tk.StringVar(value=self.layout.row_seats[self.row_var.get()][0])
+        self.seat_buttons_frame = tk.Frame(seat_frame, bg=self.bg_color)
+        self.seat_buttons_frame.pack(fill=tk.X)
+        self._seat_choices_row = None
+        self.refresh_seat_choices()
+        
+        # Booking rules
+        rules_frame = tk.Frame(controls_frame, bg=self.bg_color)
+        rules_frame.pack(fill=tk.X)
+        
+        self.accessible_var = tk.BooleanVar(value=False)
+        accessible_check = tk.Checkbutton(
+            rules_frame,
+            text="♿ Wheelchair / companion booking",
+            variable=self.accessible_var,
+            font=("Helvetica", 12),
+            bg=self.bg_color,
+            fg=self.text_color,
+            selectcolor=self.bg_color,
+            activebackground=self.bg_color,
+            anchor="w"
+        )
+        accessible_check.pack(fill=tk.X)
+        
+        self.distancing_var = tk.BooleanVar(value=self.seat_map.distancing)
+        distancing_check = tk.Checkbutton(
+            rules_frame,
+            text="↔ Leave one empty seat between parties",
+            variable=self.distancing_var,
+            command=self.on_distancing_change,
+            font=("Helvetica", 12),
+            bg=self.bg_color,
+            fg=self.text_color,
+            selectcolor=self.bg_color,
+            activebackground=self.bg_color,
+            anchor="w"
+        )
+        distancing_check.pack(fill=tk.X)
         
         # Button container
         button_container = tk.Frame(controls_frame, bg=self.bg_color)
@@ -369,6 +2085,22 @@ class MovieTheaterSeatBooking:
         )
         random_button.pack(fill=tk.X, pady=(0, 15))
         
+        # Cancel Selected Seat button
+        cancel_button = tk.Button(
+            button_container,
+            text="↩ CANCEL SELECTED SEAT",
+            command=self.cancel_seat_manual,
+            font=("Helvetica", 14, "bold"),
+            bg="#e67e22",
+            fg="white",
+            activebackground="#d35400",
+            activeforeground="white",
+            relief=tk.RAISED,
+            bd=3,
+            height=2
+        )
+        cancel_button.pack(fill=tk.X, pady=(0, 15))
+        
         # Reset All Bookings button
         reset_button = tk.Button(
             button_container,
@@ -385,6 +2117,37 @@ class MovieTheaterSeatBooking:
         )
         reset_button.pack(fill=tk.X)
     
+    def refresh_seat_choices(self):
+        """Show seat number buttons for the seats in the selected row"""
+        row_char = self.row_var.get()
+        if row_char == self._seat_choices_row:
+            return
+        self._seat_choices_row = row_char
+        self._build_seat_choices(self.layout.row_seats[row_char])
+    
+    def _build_seat_choices(self, seat_nums):
+        """Replace the seat number buttons"""
+        for widget in self.seat_buttons_frame.winfo_children():
+            widget.destroy()
+        
+        # Seat number buttons, ten to a line
+        for index, seat_num in enumerate(seat_nums):
+            btn = tk.Radiobutton(
+                self.seat_buttons_frame,
+                text=seat_num,
+                variable=self.seat_var,
+                value=seat_num,
+                font=("Helvetica", 16, "bold"),
+                bg=self.bg_color,
+                fg=self.text_color,
+                selectcolor=self.accent_color,
+                indicatoron=0,
+                width=4,
+                height=2,
+                command=lambda sn=seat_num: self.on_seat_change(sn)
+            )
+            btn.grid(row=index // 10, column=index % 10, padx=2, pady=2)
+    
     def create_booking_info(self):
         """Create booking information panel"""
         # Info container
@@ -529,7 +2292,7 @@ class MovieTheaterSeatBooking:
         
         self.total_seats_label = tk.Label(
             total_frame,
-            text="25",
+            text=str(self.seat_map.total_seats),
             font=("Helvetica", 24, "bold"),
             bg=self.bg_color,
             fg=self.text_color
@@ -551,7 +2314,7 @@ class MovieTheaterSeatBooking:
         
         self.available_seats_label = tk.Label(
             available_frame,
-            text="25",
+            text=str(self.seat_map.total_seats),
             font=("Helvetica", 24, "bold"),
             bg=self.bg_color,
             fg=self.seat_empty
@@ -623,11 +2386,26 @@ class MovieTheaterSeatBooking:
     def initialize_demo_bookings(self):
         """Initialize with some random booked seats for demonstration"""
         for _ in range(5):
-            row = random.randint(0, 4)
-            col = random.randint(0, 4)
-            if self.seat_grid[row][col] == 0:
-                self.seat_grid[row][col] = 1
-                self.booked_seats.append((row, col))
+            row, col = random.choice(self.layout.seats)
+            if self.seat_map.check_seat(row, col) is None:
+                self.seat_map.book(row, col)
+        
+        self.update_seat_display()
+        self.update_statistics()
+    
+    def load_saved_bookings(self):
+        """Restore this show's bookings from the store and persist changes from now on"""
+        show_id = self.seat_map.show_id
+        try:
+            self.store.add_show(show_id, self.layout)
+            # Holds from a previous run can never be confirmed
+            self.store.purge_holds(show_id)
+            self.seat_map.restore(self.store.load_orders(show_id))
+        except ValueError as error:
+            self.dialogs.showerror("Saved Bookings", f"{error}\n\nBookings will not be saved this session.")
+            self.store = None
+        else:
+            self.seat_map.journal = self.store
         
         self.update_seat_display()
         self.update_statistics()
@@ -635,61 +2413,85 @@ class MovieTheaterSeatBooking:
     def on_window_resize(self, event):
         """Handle window resize events"""
         if event.widget == self.root:
-            # Update screen label to fit width
-            screen_width = self.left_frame.winfo_width() - 40
-            if screen_width > 100:
-                # Adjust screen label width dynamically
-                self.screen_label.config(width=screen_width // 8)
+            self.ui_scheduler.schedule("resize", self._apply_resize)
+    
+    def _apply_resize(self):
+        """Fit the screen label to the current window width"""
+        screen_width = self.left_frame.winfo_width() - 40
+        if screen_width > 100:
+            # Adjust screen label width dynamically
+            width = screen_width // 8
+            if self._stats_cache.get("screen_width") != width:
+                self._stats_cache["screen_width"] = width
+                self.screen_label.config(width=width)
+    
+    def get_seat_color(self, row, col):
+        """Return the resting colour of a seat"""
+        if self.seat_grid[row][col] == SeatMap.BOOKED:
+            return self.seat_booked
+        if self.seat_grid[row][col] == SeatMap.BLOCKED:
+            return self.seat_blocked
+        if self.seat_map.is_wheelchair(row, col):
+            return self.seat_wheelchair
+        return self.seat_empty
+    
+    def on_distancing_change(self):
+        """Toggle the empty-seat-between-parties rule"""
+        self.seat_map.distancing = self.distancing_var.get()
+        if self.selected_seat:
+            self.select_seat(*self.selected_seat)
     
     def select_seat(self, row, col):
         """Handle seat selection via button click"""
         # Deselect previous selection
         if self.selected_seat:
             old_row, old_col = self.selected_seat
-            if self.seat_grid[old_row][old_col] == 0:
-                self.seat_buttons[old_row][old_col].config(bg=self.seat_empty)
+            if self.seat_grid[old_row][old_col] == SeatMap.FREE:
+                self.seat_buttons[old_row][old_col].config(bg=self.get_seat_color(old_row, old_col))
         
         # Update selection
         self.selected_seat = (row, col)
         
         # Update seat display
-        seat_name = f"{chr(65 + row)}{col + 1}"
+        seat_name = self.layout.seat_name(row, col)
         self.selected_info.config(text=seat_name)
         
         # Check if seat is available
-        if self.seat_grid[row][col] == 0:
+        reason = self.seat_map.check_seat(row, col, self.accessible_var.get())
+        if self.seat_grid[row][col] == SeatMap.FREE:
             self.seat_buttons[row][col].config(bg=self.seat_selected)
+        if reason is None:
             self.booking_status.config(text="✅ Seat available for booking", fg=self.seat_empty)
         else:
-            self.booking_status.config(text="❌ Seat already booked", fg=self.seat_booked)
+            self.booking_status.config(text=f"❌ {reason}", fg=self.seat_booked)
         
         # Update input controls
-        self.row_var.set(chr(65 + row))
-        self.seat_var.set(col + 1)
+        self.row_var.set(self.layout.row_labels[row])
+        self.seat_var.set(self.layout.seat_labels[row][col])
+        self.refresh_seat_choices()
     
     def on_seat_hover(self, row, col, enter):
         """Handle seat hover effects"""
         if self.selected_seat and self.selected_seat == (row, col):
             return  # Don't change color of selected seat
         
-        if enter and self.seat_grid[row][col] == 0:
+        if enter and self.seat_grid[row][col] == SeatMap.FREE:
             self.seat_buttons[row][col].config(bg=self.seat_hover)
-        elif not enter and self.seat_grid[row][col] == 0:
-            self.seat_buttons[row][col].config(bg=self.seat_empty)
+        elif not enter and self.seat_grid[row][col] == SeatMap.FREE:
+            self.seat_buttons[row][col].config(bg=self.get_seat_color(row, col))
     
     def on_row_change(self, row_char):
         """Handle row selection change"""
-        if self.selected_seat:
-            row = ord(row_char) - 65
-            col = self.seat_var.get() - 1
-            self.select_seat(row, col)
+        self.refresh_seat_choices()
+        seat = self.layout.locate(row_char, self.seat_var.get())
+        if self.selected_seat and seat:
+            self.select_seat(*seat)
     
     def on_seat_change(self, seat_num):
         """Handle seat number change"""
-        if self.selected_seat:
-            row = ord(self.row_var.get()) - 65
-            col = seat_num - 1
-            self.select_seat(row, col)
+        seat = self.layout.locate(self.row_var.get(), seat_num)
+        if self.selected_seat and seat:
+            self.select_seat(*seat)
     
     def book_seat_manual(self):
         """Book seat using manual input controls"""
@@ -698,37 +2500,31 @@ class MovieTheaterSeatBooking:
             row_char = self.row_var.get()
             seat_num = self.seat_var.get()
             
-            # Validate inputs
-            if row_char not in ['A', 'B', 'C', 'D', 'E']:
-                messagebox.showerror("Invalid Input", "Row must be between A and E")
-                return
-            
-            if seat_num < 1 or seat_num > 5:
-                messagebox.showerror("Invalid Input", "Seat number must be between 1 and 5")
+            # Validate inputs and convert to indices
+            seat = self.layout.locate(row_char, seat_num)
+            if seat is None:
+                self.dialogs.showerror("Invalid Input", f"Row {row_char} has no seat {seat_num}")
                 return
-            
-            # Convert to indices
-            row = ord(row_char) - 65
-            col = seat_num - 1
+            row, col = seat
             
             # Book the seat
             self.book_seat(row, col)
             
         except Exception as e:
-            messagebox.showerror("Error", f"Invalid input: {str(e)}")
+            self.dialogs.showerror("Error", f"Invalid input: {str(e)}")
     
     def book_seat(self, row, col):
         """Book a specific seat"""
         # Validate indices
-        if row < 0 or row > 4 or col < 0 or col > 4:
-            messagebox.showerror("Invalid Seat", "Row and seat must be between 0-4")
+        if not self.layout.is_seat(row, col):
+            self.dialogs.showerror("Invalid Seat", f"There is no seat at row {row}, position {col}")
             return
         
-        # Check if seat is available
-        if self.seat_grid[row][col] == 0:
-            # Update seat grid
-            self.seat_grid[row][col] = 1
-            self.booked_seats.append((row, col))
+        # Check if seat is available under the layout rules
+        reason = self.seat_map.check_seat(row, col, self.accessible_var.get())
+        if reason is None:
+            # Update seat map
+            self.seat_map.book(row, col, self.accessible_var.get())
             
             # Update seat display
             self.update_seat_display()
@@ -737,14 +2533,14 @@ class MovieTheaterSeatBooking:
             self.update_statistics()
             
             # Show confirmation
-            seat_name = f"{chr(65 + row)}{col + 1}"
+            seat_name = self.layout.seat_name(row, col)
             self.last_booking_info.config(text=f"✅ Seat {seat_name} booked successfully")
             
             # Success message
-            messagebox.showinfo(
+            self.dialogs.showinfo(
                 "🎉 Booking Confirmed!",
                 f"✅ Seat {seat_name} has been successfully booked!\n\n"
-                f"📍 Location: Row {chr(65 + row)}, Seat {col + 1}\n"
+                f"📍 Location: Row {self.layout.row_labels[row]}, Seat {self.layout.seat_labels[row][col]}\n"
                 f"📊 Total booked seats: {len(self.booked_seats)}\n"
                 f"🎬 Enjoy your movie!"
             )
@@ -757,55 +2553,111 @@ class MovieTheaterSeatBooking:
             self.selected_info.config(text="NONE")
             
         else:
-            # Seat already booked
-            seat_name = f"{chr(65 + row)}{col + 1}"
-            messagebox.showwarning(
+            # Seat already booked or restricted
+            seat_name = self.layout.seat_name(row, col)
+            self.dialogs.showwarning(
                 "⚠️ Seat Unavailable",
-                f"❌ Seat {seat_name} is already booked!\n\n"
+                f"❌ Seat {seat_name} cannot be booked: {reason}\n\n"
                 f"Please select another available seat."
             )
             
             # Update booking status
-            self.booking_status.config(text=f"❌ Seat {seat_name} already taken", fg=self.seat_booked)
+            self.booking_status.config(text=f"❌ Seat {seat_name}: {reason}", fg=self.seat_booked)
     
     def book_random_seat(self):
         """Book a random available seat"""
-        available_seats = []
-        
-        # Find all available seats
-        for row in range(5):
-            for col in range(5):
-                if self.seat_grid[row][col] == 0:
-                    available_seats.append((row, col))
-        
-        if not available_seats:
-            messagebox.showinfo("No Seats Available", "🎫 All seats are already booked!")
+        # Pick from the engine's free-seat pool
+        seat = self.seat_map.random_free_seat(self.accessible_var.get())
+        
+        if seat is None:
+            if self.dialogs.askyesno(
+                "No Seats Available",
+                "🎫 All seats are already booked!\n\n"
+                "Join the waitlist? A seat will be booked automatically when one is released."
+            ):
+                request_id, order_id = self.seat_map.join_waitlist(1)
+                if order_id is not None:
+                    # A seat was released in the meantime
+                    names = ", ".join(self.layout.seat_name(r, c) for r, c in self.seat_map.orders[order_id])
+                    self.last_booking_info.config(text=f"✅ Seat {names} booked successfully")
+                    self.update_seat_display()
+                    self.update_statistics()
+                else:
+                    waiting = len(self.seat_map.waitlist)
+                    self.booking_status.config(
+                        text=f"⏳ Waitlist request #{request_id} queued ({waiting} waiting)",
+                        fg=self.seat_hover
+                    )
             return
         
-        # Select random available seat
-        row, col = random.choice(available_seats)
+        row, col = seat
         
         # Select and book the seat
         self.select_seat(row, col)
         self.book_seat(row, col)
     
+    def cancel_seat_manual(self):
+        """Cancel the booking for the seat chosen in the input controls"""
+        seat = self.layout.locate(self.row_var.get(), self.seat_var.get())
+        if seat is None:
+            self.dialogs.showerror("Invalid Input", f"Row {self.row_var.get()} has no seat {self.seat_var.get()}")
+            return
+        row, col = seat
+        seat_name = self.layout.seat_name(row, col)
+        
+        order_id = self.booked_seats.get((row, col))
+        if order_id is None:
+            self.dialogs.showinfo("Not Booked", f"Seat {seat_name} has no booking to cancel.")
+            return
+        
+        order_seats = self.seat_map.orders[order_id]
+        if len(order_seats) > 1 and self.dialogs.askyesno(
+            "Cancel Order",
+            f"Seat {seat_name} is part of an order of {len(order_seats)} seats.\n\n"
+            f"Cancel the whole order?"
+        ):
+            released = self.seat_map.cancel_order(order_id)
+        else:
+            self.seat_map.cancel_seat(row, col)
+            released = [(row, col)]
+        
+        self.update_seat_display()
+        self.update_statistics()
+        
+        names = ", ".join(self.layout.seat_name(r, c) for r, c in released)
+        self.booking_status.config(text=f"↩ Released {names}", fg=self.seat_empty)
+        self.last_booking_info.config(text=f"↩ Booking for {names} cancelled")
+    
+    def on_waitlist_allocated(self, request_id, order_id, seats):
+        """Show seats booked automatically for a waitlisted party"""
+        names = ", ".join(self.layout.seat_name(r, c) for r, c in seats)
+        self.last_booking_info.config(text=f"⏳ Waitlist request #{request_id} seated in {names}")
+        self.update_seat_display()
+        self.update_statistics()
+    
+    def expire_holds_tick(self):
+        """Release expired seat holds once a second"""
+        if self.seat_map.expire_holds():
+            self.update_seat_display()
+            self.update_statistics()
+        self.root.after(1000, self.expire_holds_tick)
+    
     def reset_all_bookings(self):
         """Reset all bookings"""
         if not self.booked_seats:
-            messagebox.showinfo("No Bookings", "There are no bookings to reset.")
+            self.dialogs.showinfo("No Bookings", "There are no bookings to reset.")
             return
         
         # Confirm reset
-        response = messagebox.askyesno(
+        response = self.dialogs.askyesno(
             "⚠️ Confirm Reset",
             f"Are you sure you want to reset all bookings?\n\n"
             f"This will clear {len(self.booked_seats)} booked seats."
         )
         
         if response:
-            # Reset seat grid
-            self.seat_grid = [[0 for _ in range(5)] for _ in range(5)]
-            self.booked_seats = []
+            # Reset seat map
+            self.seat_map.reset()
             self.selected_seat = None
             
             # Update UI
@@ -817,59 +2669,349 @@ class MovieTheaterSeatBooking:
             self.booking_status.config(text="✅ All bookings cleared - Ready to book", fg=self.seat_empty)
             self.last_booking_info.config(text="No bookings yet")
             
-            messagebox.showinfo("✅ Reset Complete", "All bookings have been cleared successfully.")
+            self.dialogs.showinfo("✅ Reset Complete", "All bookings have been cleared successfully.")
     
     def update_seat_display(self):
+        """Schedule a repaint of all seats for the next frame"""
+        self.ui_scheduler.schedule("seats", self._repaint_seats)
+    
+    def _repaint_seats(self):
         """Update the visual display of all seats"""
-        for row in range(5):
-            for col in range(5):
-                if self.seat_grid[row][col] == 0:
-                    # Empty seat
-                    if self.selected_seat and self.selected_seat == (row, col):
-                        self.seat_buttons[row][col].config(
-                            bg=self.seat_selected,
-                            state="normal"
-                        )
-                    else:
-                        self.seat_buttons[row][col].config(
-                            bg=self.seat_empty,
-                            state="normal"
-                        )
+        for row, col in self.layout.seats:
+            if self.seat_grid[row][col] == SeatMap.FREE:
+                # Empty seat
+                if self.selected_seat and self.selected_seat == (row, col):
+                    self.seat_buttons[row][col].config(
+                        bg=self.seat_selected,
+                        state="normal"
+                    )
                 else:
-                    # Booked seat
                     self.seat_buttons[row][col].config(
-                        bg=self.seat_booked,
-                        state="disabled"
+                        bg=self.get_seat_color(row, col),
+                        state="normal"
                     )
+            else:
+                # Booked or blocked seat
+                self.seat_buttons[row][col].config(
+                    bg=self.get_seat_color(row, col),
+                    state="disabled"
+                )
     
     def update_statistics(self):
+        """Schedule a statistics refresh for the next frame"""
+        self.ui_scheduler.schedule("statistics", self._refresh_statistics)
+    
+    def _set_stat(self, key, widget, **options):
+        """Reconfigure a widget only when the displayed value changed"""
+        if self._stats_cache.get(key) != options:
+            self._stats_cache[key] = options
+            widget.config(**options)
+    
+    def _refresh_statistics(self):
         """Update statistics display"""
-        total_seats = 25
+        total_seats = self.seat_map.total_seats
         booked_seats = len(self.booked_seats)
         available_seats = total_seats - booked_seats
-        occupancy_rate = (booked_seats / total_seats) * 100
+        # A layout may have no bookable seats at all
+        occupancy_rate = (booked_seats / total_seats) * 100 if total_seats else 0.0
         
         # Update labels
-        self.available_seats_label.config(text=str(available_seats))
-        self.booked_seats_label.config(text=str(booked_seats))
-        self.occupancy_label.config(text=f"{occupancy_rate:.1f}%")
+        self._set_stat("available", self.available_seats_label, text=str(available_seats))
+        self._set_stat("booked", self.booked_seats_label, text=str(booked_seats))
+        self._set_stat("occupancy", self.occupancy_label, text=f"{occupancy_rate:.1f}%")
         
         # Update progress bar
-        self.occupancy_bar['value'] = occupancy_rate
+        self._set_stat("bar", self.occupancy_bar, value=occupancy_rate)
         
         # Update progress bar color based on occupancy
         if occupancy_rate < 30:
-            self.occupancy_bar.config(style="green.Horizontal.TProgressbar")
+            style = "green.Horizontal.TProgressbar"
         elif occupancy_rate < 70:
-            self.occupancy_bar.config(style="yellow.Horizontal.TProgressbar")
+            style = "yellow.Horizontal.TProgressbar"
         else:
-            self.occupancy_bar.config(style="red.Horizontal.TProgressbar")
+            style = "red.Horizontal.TProgressbar"
+        self._set_stat("bar_style", self.occupancy_bar, style=style)
 
-def main():
-    """Main function to run the application"""
-    root = tk.Tk()
+
+class SessionRecorder:
+    """Records operator sessions as a JSON-lines event log
+
+    Each line is either a handler call with the control state at the time
+    (row, seat number and booking-rule toggles) or the answer to a yes/no
+    dialog. Only the outermost handler is logged, so ``book_random_seat``
+    calling ``select_seat`` records one event.
+    """
+
+    HANDLERS = (
+        "select_seat",
+        "on_seat_hover",
+        "on_row_change",
+        "on_seat_change",
+        "on_distancing_change",
+        "book_seat_manual",
+        "book_random_seat",
+        "cancel_seat_manual",
+        "reset_all_bookings"
+    )
+
+    def __init__(self, path, seed):
+        self.path = path
+        self.seed = seed
+        self.file = None
+        self.app = None
+        self._depth = 0
+        self._start = 0.0
+
+    def attach(self, app):
+        """Wrap the app's handlers and dialogs (called before the GUI is built)"""
+        self.app = app
+        for name in self.HANDLERS:
+            setattr(app, name, self._wrap(name, getattr(app, name)))
+        app.dialogs = RecordingDialogs(app.dialogs, self)
+
+    def begin(self):
+        """Write the session header once the app has finished starting up"""
+        # Buffered: events are written out in blocks, not on every hover
+        self.file = open(self.path, "w", encoding="utf-8", buffering=1 << 16)
+        self._start = time.perf_counter()
+        seat_map = self.app.seat_map
+        self._write({
+            "session": 1,
+            "seed": self.seed,
+            "layout": self.app.layout.to_dict(),
+            "distancing": seat_map.distancing,
+            "orders": [[order_id, seats] for order_id, seats in seat_map.orders.items()]
+        })
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def _write(self, event):
+        if self.file is not None:
+            self.file.write(json.dumps(event) + "\n")
+
+    def _elapsed(self):
+        return round(time.perf_counter() - self._start, 6)
+
+    def _wrap(self, name, handler):
+        def recorded(*args):
+            if self._depth == 0:
+                self._write({
+                    "t": self._elapsed(),
+                    "handler": name,
+                    "args": list(args),
+                    "state": {
+                        "row": self.app.row_var.get(),
+                        "seat": self.app.seat_var.get(),
+                        "accessible": self.app.accessible_var.get(),
+                        "distancing": self.app.distancing_var.get()
+                    }
+                })
+            self._depth += 1
+            try:
+                return handler(*args)
+            finally:
+                self._depth -= 1
+        return recorded
+
+    def record_answer(self, answer):
+        self._write({"t": self._elapsed(), "dialog": "askyesno", "answer": answer})
+
+
+class RecordingDialogs:
+    """Passes dialogs through to Tk, logging the operator's yes/no answers"""
+
+    def __init__(self, dialogs, recorder):
+        self.dialogs = dialogs
+        self.recorder = recorder
+
+    def showinfo(self, title, message):
+        return self.dialogs.showinfo(title, message)
+
+    def showwarning(self, title, message):
+        return self.dialogs.showwarning(title, message)
+
+    def showerror(self, title, message):
+        return self.dialogs.showerror(title, message)
+
+    def askyesno(self, title, message):
+        answer = self.dialogs.askyesno(title, message)
+        self.recorder.record_answer(answer)
+        return answer
+
+
+class ReplayDialogs:
+    """Non-blocking dialogs that answer yes/no questions from a recorded session"""
+
+    def __init__(self, answers):
+        self.answers = list(reversed(answers))
+        self.messages = []
+
+    def _show(self, title, message):
+        self.messages.append((title, message))
+        return "ok"
+
+    showinfo = showwarning = showerror = _show
+
+    def askyesno(self, title, message):
+        self.messages.append((title, message))
+        return self.answers.pop() if self.answers else False
+
+
+class _StubWidget:
+    """Stands in for a Tk widget or the root window, remembering its configuration"""
+
+    def __init__(self):
+        self.options = {}
+        self._jobs = itertools.count(1)
+
+    def config(self, **options):
+        self.options.update(options)
+
+    configure = config
+
+    def after(self, delay, callback=None):
+        return f"after#{next(self._jobs)}"
+
+    def winfo_width(self):
+        return 0
+
+    def __getattr__(self, name):
+        # Window-manager calls, bind, update, destroy, ...
+        return lambda *args, **kwargs: None
+
+
+class _StubVar:
+    """Stands in for a Tk variable"""
+
+    def __init__(self, value):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+
+class HeadlessSeatBooking(MovieTheaterSeatBooking):
+    """The booking GUI with stub widgets, so its handlers run without a display
+
+    Only widget construction is replaced: every handler, the UI scheduler
+    and the repaint and statistics code are the real ones. Used to replay
+    recorded sessions at full speed.
+    """
+
+    def __init__(self, layout=None, **options):
+        super().__init__(_StubWidget(), layout, **options)
+
+    def create_gui(self):
+        for name in ("main_container", "left_frame", "right_frame", "screen_label", "seat_buttons_frame",
+                     "book_button", "selected_info", "booking_status", "last_booking_info", "total_seats_label",
+                     "available_seats_label", "booked_seats_label", "occupancy_label", "occupancy_bar"):
+            setattr(self, name, _StubWidget())
+        self.seat_buttons = [[_StubWidget() for _ in range(self.layout.cols)] for _ in range(self.layout.rows)]
+        self.row_var = _StubVar(self.layout.row_labels[0])
+        self.seat_var = _StubVar(self.layout.row_seats[self.row_var.get()][0])
+        self.accessible_var = _StubVar(False)
+        self.distancing_var = _StubVar(self.seat_map.distancing)
+        self._seat_choices_row = None
+        self.seat_choices = []
+
+    def _build_seat_choices(self, seat_nums):
+        self.seat_choices = list(seat_nums)
+
+
+def load_session(path):
+    """Read a recorded session, returning (header, handler events, dialog answers)"""
+    with open(path, encoding="utf-8") as f:
+        lines = [json.loads(line) for line in f if line.strip()]
+    header, events = lines[0], lines[1:]
+    answers = [event["answer"] for event in events if "dialog" in event]
+    return header, [event for event in events if "handler" in event], answers
+
+
+def replay_session(path, headless=True, speed=None):
+    """Replay a recorded session through the GUI handlers
     
-    # Configure progress bar styles
+    Returns (latencies, seat_map): per-handler latencies in milliseconds and
+    the seat map as the session left it. Each handler is timed including
+    the frame it schedules. ``headless`` runs the handlers against stub
+    widgets (HeadlessSeatBooking); otherwise a real Tk window is built,
+    which needs a display; on a headless machine run it under
+    ``xvfb-run``. ``speed`` scales the recorded gaps between events; None
+    replays back to back. Both paths start from the recorded bookings and
+    distancing setting.
+    """
+    header, events, answers = load_session(path)
+    dialogs = ReplayDialogs(answers)
+    layout = TheaterLayout.from_dict(header["layout"])
+    orders = {order_id: [tuple(seat) for seat in seats] for order_id, seats in header["orders"]}
+    
+    if headless:
+        root = None
+        target = HeadlessSeatBooking(layout, dialogs=dialogs)
+    else:
+        try:
+            root = tk.Tk()
+        except tk.TclError as e:
+            raise RuntimeError(f"Tk replay needs a display (try running under xvfb-run): {e}") from e
+        configure_styles()
+        target = MovieTheaterSeatBooking(root, layout, dialogs=dialogs)
+    
+    # Replace the demo bookings with the recorded starting state
+    target.seat_map.reset()
+    target.seat_map.restore(orders)
+    target.seat_map.distancing = header["distancing"]
+    target.distancing_var.set(header["distancing"])
+    target.update_seat_display()
+    target.update_statistics()
+    target.ui_scheduler.flush()
+    if root is not None:
+        root.update()
+    random.seed(header["seed"])
+    
+    latencies = {}
+    previous_t = 0.0
+    for event in events:
+        if speed:
+            time.sleep(max(0.0, event["t"] - previous_t) / speed)
+        previous_t = event["t"]
+        
+        handler = getattr(target, event["handler"])
+        state = event["state"]
+        start = time.perf_counter()
+        target.row_var.set(state["row"])
+        target.refresh_seat_choices()
+        target.seat_var.set(state["seat"])
+        target.accessible_var.set(state["accessible"])
+        target.distancing_var.set(state["distancing"])
+        handler(*event["args"])
+        target.ui_scheduler.flush()
+        if root is not None:
+            root.update_idletasks()
+        latencies.setdefault(event["handler"], []).append((time.perf_counter() - start) * 1000)
+    
+    if root is not None:
+        root.destroy()
+    return latencies, target.seat_map
+
+
+def format_latencies(latencies):
+    """Format replay latencies as one summary line per handler"""
+    lines = []
+    for name, samples in sorted(latencies.items()):
+        ordered = sorted(samples)
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        lines.append(f"{name:<22} calls {len(ordered):>6}  mean {sum(ordered) / len(ordered):8.3f} ms  "
+                     f"p95 {p95:8.3f} ms  max {ordered[-1]:8.3f} ms")
+    return "\n".join(lines)
+
+
+def configure_styles():
+    """Configure the ttk progress bar styles"""
     style = ttk.Style()
     style.theme_use('clam')
     
@@ -897,10 +3039,138 @@ def main():
         lightcolor='#e74c3c',
         darkcolor='#c0392b'
     )
+
+
+def main():
+    """Main function to run the application"""
+    parser = argparse.ArgumentParser(description="Movie Theater Seat Booking System")
+    parser.add_argument("--layout", metavar="PATH",
+                        help="auditorium layout file (JSON); defaults to the built-in 5x5 hall")
+    parser.add_argument("--db", metavar="PATH",
+                        help="persist bookings in this SQLite database")
+    parser.add_argument("--show", default="main",
+                        help="show id to book (with --db, selects the saved show)")
+    parser.add_argument("--bench-db", metavar="PATH",
+                        help="benchmark SQLite bookings/sec using a scratch database at PATH")
+    parser.add_argument("--bench-admission", action="store_true",
+                        help="simulate an on-sale spike through the admission controller and print latencies")
+    parser.add_argument("--render", metavar="PATH",
+                        help="write the seat map to PATH (.svg, .png or .html) and exit")
+    parser.add_argument("--no-coalesce", action="store_true",
+                        help="apply every UI update immediately instead of once per frame")
+    parser.add_argument("--profile", metavar="PATH",
+                        help="profile Tk callbacks; print a summary and write collapsed stacks to PATH on exit")
+    parser.add_argument("--frame-budget", type=float, default=16.7, metavar="MS",
+                        help="with --profile, flag callbacks that block the main loop longer than this")
+    parser.add_argument("--measure-lag", action="store_true",
+                        help="print Tk event-loop lag statistics on exit")
+    parser.add_argument("--record", metavar="PATH",
+                        help="record this session's handler events to a JSON-lines log")
+    parser.add_argument("--replay", metavar="PATH",
+                        help="replay a recorded session and print handler latencies")
+    parser.add_argument("--headless", action="store_true",
+                        help="with --replay, run the handlers against stub widgets (no Tk window); "
+                             "without it a display is needed, e.g. via xvfb-run")
+    parser.add_argument("--speed", type=float,
+                        help="with --replay, scale recorded timing by this factor (default: no delays)")
+    args = parser.parse_args()
+    
+    if args.bench_db:
+        for batch_size in (1, 10, 100):
+            rate = benchmark_store(args.bench_db, batch_size=batch_size)
+            print(f"batch of {batch_size:>3} orders per transaction: {rate:,.0f} bookings/sec")
+        return
+    
+    if args.bench_admission:
+        layout = TheaterLayout.load(args.layout) if args.layout else None
+        result = benchmark_admission(layout, rate=2000.0, burst=200, max_sessions=32, max_wait=2.0)
+        print(f"{result['booked']} booked, {result['sold_out']} found it sold out, {result['shed']} shed "
+              f"in {result['elapsed_s']:.2f} s")
+        print(f"checkout latency: p50 {result['p50_ms']:.3f} ms, p99 {result['p99_ms']:.3f} ms, "
+              f"max {result['max_ms']:.3f} ms over the last {result['checkouts']} checkouts")
+        return
+    
+    if args.render:
+        fmt = os.path.splitext(args.render)[1].lstrip(".").lower()
+        if fmt not in SeatMapRenderer.FORMATS:
+            parser.error(f"--render must end in one of: {', '.join('.' + f for f in SeatMapRenderer.FORMATS)}")
+        layout = TheaterLayout.load(args.layout) if args.layout else None
+        orders = {}
+        if args.db:
+            store = SQLiteBookingStore(args.db, pool_size=1)
+            try:
+                # Without --layout, draw the show in the layout it was saved with
+                layout = layout or store.load_layout(args.show)
+                orders = store.load_orders(args.show, include_held=True)
+            finally:
+                store.close()
+        layout = layout or TheaterLayout.default()
+        seat_map = SeatMap.from_layout(layout, show_id=args.show)
+        try:
+            seat_map.restore(orders)
+        except ValueError as error:
+            parser.error(f"--db: {error}")
+        output = SeatMapRenderer(layout).render(seat_map.snapshot(), fmt)
+        with open(args.render, "wb") as f:
+            f.write(output if isinstance(output, bytes) else output.encode("utf-8"))
+        return
+    
+    if args.replay:
+        latencies, _ = replay_session(args.replay, headless=args.headless, speed=args.speed)
+        print(format_latencies(latencies))
+        return
+    
+    recorder = None
+    if args.record:
+        seed = random.randrange(2 ** 32)
+        random.seed(seed)
+        recorder = SessionRecorder(args.record, seed)
+    
+    profiler = None
+    if args.profile:
+        profiler = CallbackProfiler(frame_budget_ms=args.frame_budget)
+        profiler.install(MovieTheaterSeatBooking)
+    
+    root = tk.Tk()
+    
+    # Configure progress bar styles
+    configure_styles()
     
     # Create and run the application
-    app = MovieTheaterSeatBooking(root)
+    layout = TheaterLayout.load(args.layout) if args.layout else None
+    store = SQLiteBookingStore(args.db) if args.db else None
+    if profiler is not None:
+        with profiler.measure("startup"):
+            app = MovieTheaterSeatBooking(root, layout, coalesce_updates=not args.no_coalesce,
+                                          recorder=recorder, store=store, show_id=args.show)
+    else:
+        app = MovieTheaterSeatBooking(root, layout, coalesce_updates=not args.no_coalesce, recorder=recorder,
+                                      store=store, show_id=args.show)
+    if recorder is not None:
+        random.seed(recorder.seed)
+        recorder.begin()
+    
+    lag_monitor = LagMonitor(root)
+    if args.measure_lag:
+        lag_monitor.start()
+    
     root.mainloop()
+    
+    if args.measure_lag:
+        lag = lag_monitor.summary()
+        print(f"Event-loop lag over {lag['samples']} samples: "
+              f"mean {lag['mean_ms']:.2f} ms, p95 {lag['p95_ms']:.2f} ms, max {lag['max_ms']:.2f} ms")
+        print(f"UI updates: {app.ui_scheduler.requests} requested, {app.ui_scheduler.frames} frames rendered")
+    
+    if recorder is not None:
+        recorder.close()
+    if store is not None:
+        store.close()
+    if profiler is not None:
+        profiler.uninstall()
+        print(profiler.summary())
+        profiler.dump(args.profile)
+        print(f"Collapsed stacks written to {args.profile}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
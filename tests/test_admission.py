@@ -0,0 +1,113 @@
+import pytest
+
+from Movie_Theater import AdmissionController, SeatMap
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def controller(clock):
+    return AdmissionController(rate=10.0, burst=1, max_sessions=1, max_wait=0.5, clock=clock)
+
+
+def test_queued_ticket_is_admitted_after_release(controller, clock):
+    status, session_id = controller.request("main")
+    assert status == AdmissionController.ADMITTED
+
+    status, first = controller.request("main")
+    assert status == AdmissionController.QUEUED
+    status, second = controller.request("main")
+    assert status == AdmissionController.QUEUED
+
+    assert controller.poll("main", first) == (AdmissionController.QUEUED, None, 1)
+    assert controller.poll("main", second) == (AdmissionController.QUEUED, None, 2)
+
+    controller.release("main", session_id)
+    clock.now += 0.1
+    status, admitted, position = controller.poll("main", first)
+    assert status == AdmissionController.ADMITTED
+    assert admitted != session_id and position is None
+    # The ticket is spent once its session has been collected
+    assert controller.poll("main", first) == (AdmissionController.REJECTED, None, None)
+    assert controller.poll("main", second) == (AdmissionController.QUEUED, None, 1)
+
+
+def test_long_queue_is_shed(controller):
+    controller.request("main")
+    statuses = [controller.request("main")[0] for _ in range(7)]
+    assert statuses == [AdmissionController.QUEUED] * 6 + [AdmissionController.REJECTED]
+    assert controller.counts == {AdmissionController.ADMITTED: 1, AdmissionController.QUEUED: 6,
+                                 AdmissionController.REJECTED: 1}
+
+
+def test_abandoned_ticket_is_skipped(controller, clock):
+    _, session_id = controller.request("main")
+    _, first = controller.request("main")
+    _, second = controller.request("main")
+    controller.abandon("main", first)
+    assert controller.poll("main", first)[0] == AdmissionController.REJECTED
+
+    controller.release("main", session_id)
+    clock.now += 0.1
+    assert controller.poll("main", second)[0] == AdmissionController.ADMITTED
+
+
+def test_checkout_latency_includes_queueing(controller, clock):
+    seat_map = SeatMap(2, 2, show_id="main")
+    _, session_id = controller.request("main")
+    _, ticket = controller.request("main")
+    clock.now += 0.25
+    assert controller.checkout(seat_map, session_id, 2) == [(0, 0), (0, 1)]
+
+    clock.now += 0.25
+    _, queued_session, _ = controller.poll("main", ticket)
+    clock.now += 0.25
+    controller.checkout(seat_map, queued_session, 2)
+    assert list(controller.latencies) == [250.0, 750.0]
+
+    with pytest.raises(PermissionError):
+        controller.checkout(seat_map, queued_session)
+
+
+def test_latency_samples_are_bounded(clock):
+    controller = AdmissionController(rate=100.0, burst=100, latency_samples=3, clock=clock)
+    seat_map = SeatMap(1, 10, show_id="main")
+    for _ in range(5):
+        _, session_id = controller.request("main")
+        controller.checkout(seat_map, session_id)
+    assert len(controller.latencies) == 3
+    assert controller.latency_summary()["checkouts"] == 3
+
+
+def test_uncollected_tickets_are_dropped_when_their_sessions_expire(clock):
+    controller = AdmissionController(rate=1000.0, burst=1000, max_sessions=1, session_ttl=1.0, clock=clock)
+    _, session_id = controller.request("main")
+    tickets = [controller.request("main")[1] for _ in range(200)]
+    controller.release("main", session_id)
+    # Each expiry admits the next ticket, but no client ever collects one
+    for _ in range(len(tickets) + 1):
+        clock.now += 1.0
+        controller.poll("main", 0)
+    gate = controller._gate("main")
+    assert len(gate.tickets) == len(gate.session_tickets) == 0
+    assert controller.poll("main", tickets[0])[0] == AdmissionController.REJECTED
+
+
+def test_position_skips_abandoned_tickets(controller):
+    controller.request("main")
+    tickets = [controller.request("main")[1] for _ in range(5)]
+    controller.abandon("main", tickets[0])
+    controller.abandon("main", tickets[2])
+    assert [controller.poll("main", ticket)[2] for ticket in tickets[3:]] == [2, 3]
+    assert controller.poll("main", tickets[1])[2] == 1
@@ -0,0 +1,74 @@
+import json
+
+import pytest
+
+from Movie_Theater import TheaterLayout
+
+
+SPEC = {
+    "name": "Studio",
+    "rows": [
+        {"label": "A", "seats": ["1", "2", None, "3"]},
+        {"label": "B", "seats": 3, "offset": 1, "wheelchair": ["1"], "companion": ["2"]}
+    ]
+}
+
+
+def write_layout(tmp_path, spec):
+    path = tmp_path / "studio.json"
+    path.write_text(json.dumps(spec), encoding="utf-8")
+    return str(path)
+
+
+def test_lookup_tables():
+    layout = TheaterLayout.from_dict(SPEC)
+    assert (layout.rows, layout.cols) == (2, 4)
+    assert layout.parse("A3") == (0, 3)
+    assert layout.locate("B", "1") == (1, 1)
+    assert layout.gaps == [(0, 2), (1, 0)]
+    assert layout.wheelchair == [(1, 1)]
+    assert layout.parse("A4") is None
+
+
+def test_cache_round_trip(tmp_path):
+    path = write_layout(tmp_path, SPEC)
+    compiled = TheaterLayout.load(path)
+    cached = TheaterLayout.load(path)
+    assert (tmp_path / "studio.json.cache").exists()
+    assert cached.__dict__ == compiled.__dict__
+
+
+def test_cache_follows_file_contents(tmp_path):
+    path = write_layout(tmp_path, SPEC)
+    TheaterLayout.load(path)
+    write_layout(tmp_path, dict(SPEC, name="Stadio"))
+    assert TheaterLayout.load(path).name == "Stadio"
+
+
+def test_corrupt_cache_is_ignored(tmp_path):
+    path = write_layout(tmp_path, SPEC)
+    (tmp_path / "studio.json.cache").write_bytes(b"not a cache")
+    assert TheaterLayout.load(path).parse("B3") == (1, 3)
+
+
+def test_cache_is_used_when_valid(tmp_path, monkeypatch):
+    path = write_layout(tmp_path, SPEC)
+    compiled = TheaterLayout.load(path)
+
+    def fail(spec):
+        raise AssertionError("layout was recompiled")
+
+    monkeypatch.setattr(TheaterLayout, "from_dict", fail)
+    assert TheaterLayout.load(path).__dict__ == compiled.__dict__
+
+
+@pytest.mark.parametrize("spec, message", [
+    ({"rows": []}, "no rows"),
+    ({"rows": [{"label": "A", "seats": [None, None]}]}, "Row 'A' has no seats"),
+    ({"rows": [{"label": "A", "seats": 4, "blocked": ["9"]}]}, "Row 'A' lists blocked seat '9'"),
+    ({"rows": [{"label": "A", "seats": 2}, {"label": "B", "seats": 2, "companion": ["3"]}]},
+     "Row 'B' lists companion seat '3'"),
+])
+def test_invalid_layouts_are_rejected(spec, message):
+    with pytest.raises(ValueError, match=message):
+        TheaterLayout.from_dict(spec)
@@ -0,0 +1,69 @@
+import tkinter as tk
+
+import pytest
+
+from Movie_Theater import CallbackProfiler
+
+
+@pytest.fixture
+def profiler():
+    profiler = CallbackProfiler(frame_budget_ms=1000.0)
+    profiler.install()
+    yield profiler
+    profiler.uninstall()
+
+
+def collapsed(profiler, tmp_path):
+    path = tmp_path / "stacks.txt"
+    profiler.dump(str(path))
+    return [line.rsplit(" ", 1)[0] for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_after_jobs_are_named_after_their_function(profiler, tmp_path):
+    # A bare Tcl interpreter runs after() jobs without needing a display
+    interp = tk.Tcl()
+    ran = []
+    inner = profiler.wrap(lambda: ran.append("inner"), "inner")
+
+    def tick():
+        ran.append("tick")
+        inner()
+
+    interp.after(0, tick)
+    interp.after(0, lambda: ran.append("lambda"))
+    interp.update()
+
+    assert ran == ["tick", "inner", "lambda"]
+    tick_name = f"after {tick.__qualname__}"
+    lambda_names = [name for name in profiler.stats if name.startswith("after ") and "<lambda>:" in name]
+    assert len(lambda_names) == 1
+    assert profiler.stats[tick_name][0] == profiler.stats["inner"][0] == 1
+    assert collapsed(profiler, tmp_path) == sorted([
+        tick_name.replace(" ", "_"), f"{tick_name};inner".replace(" ", "_"), lambda_names[0].replace(" ", "_")
+    ])
+
+
+def test_bind_and_command_callbacks_are_named(profiler, tmp_path):
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        pytest.skip("needs a display")
+    try:
+        def on_ping(event):
+            pass
+
+        def on_press():
+            pass
+
+        frame = tk.Frame(root)
+        frame.bind("<<Ping>>", on_ping)
+        frame.event_generate("<<Ping>>")
+        tk.Button(root, command=on_press).invoke()
+        root.update()
+    finally:
+        root.destroy()
+
+    bind_name, command_name = f"bind {on_ping.__qualname__}", f"command {on_press.__qualname__}"
+    assert profiler.stats[bind_name][0] == profiler.stats[command_name][0] == 1
+    stacks = collapsed(profiler, tmp_path)
+    assert bind_name.replace(" ", "_") in stacks and command_name.replace(" ", "_") in stacks
@@ -0,0 +1,73 @@
+import struct
+import zlib
+
+import pytest
+
+from Movie_Theater import SeatMap, SeatMapRenderer, TheaterLayout
+
+
+SPEC = {
+    "name": "Curved",
+    "rows": [
+        {"label": "A", "seats": 6, "curve": 0.5},
+        {"label": "B", "seats": 6, "curve": -0.75, "wheelchair": ["1"]},
+        {"label": "C", "seats": 2, "offset": 2, "curve": -1.0}
+    ]
+}
+
+
+def png_chunks(data):
+    assert data[:8] == b"\x89PNG\r\n\x1a\n"
+    chunks, offset = {}, 8
+    while offset < len(data):
+        length, tag = struct.unpack(">I4s", data[offset:offset + 8])
+        chunks[tag] = data[offset + 8:offset + 8 + length]
+        offset += 12 + length
+    return chunks
+
+
+def mutations(seat_map):
+    """Book and cancel a few seats, yielding after each change"""
+    seat_map.book(0, 0)
+    yield
+    seat_map.book(1, 5)
+    yield
+    seat_map.book_party(3)
+    yield
+    seat_map.cancel_seat(0, 0)
+    yield
+    seat_map.cancel_order(next(iter(seat_map.orders)))
+    yield
+
+
+@pytest.mark.parametrize("fmt", ["svg", "png"])
+def test_incremental_render_matches_fresh_render(fmt):
+    layout = TheaterLayout.from_dict(SPEC)
+    seat_map = SeatMap.from_layout(layout)
+    renderer = SeatMapRenderer(layout)
+    renderer.render(seat_map.snapshot(), fmt)
+    for _ in mutations(seat_map):
+        snapshot = seat_map.snapshot()
+        assert renderer.render(snapshot, fmt) == SeatMapRenderer(layout).render(snapshot, fmt)
+    # Only the changed seats were redrawn after the first render
+    assert renderer.seats_drawn < len(layout.seats) * 2
+
+
+@pytest.mark.parametrize("curves", [(0.0, 0.0, 0.0), (0.5, -0.75, -1.0), (-2.0, -2.0, -2.0), (1.5, 0.0, 3.0)])
+def test_png_size_matches_pixel_data(curves):
+    spec = {"rows": [dict(row, curve=curve) for row, curve in zip(SPEC["rows"], curves)]}
+    layout = TheaterLayout.from_dict(spec)
+    renderer = SeatMapRenderer(layout)
+    chunks = png_chunks(renderer.render(SeatMap.from_layout(layout).snapshot(), "png"))
+    width, height = struct.unpack(">II", chunks[b"IHDR"][:8])
+    assert (width, height) == (renderer.width, renderer.height)
+    assert len(zlib.decompress(chunks[b"IDAT"])) == height * (1 + width * 3)
+    for x, y in renderer.positions.values():
+        assert 0 <= x and x + renderer.seat_size <= width
+        assert renderer.seat_size <= y and y + renderer.seat_size <= height
+
+
+def test_two_seat_rows_bend_symmetrically():
+    layout = TheaterLayout.from_dict({"rows": [{"label": "A", "seats": 2, "curve": 1.0}]})
+    renderer = SeatMapRenderer(layout)
+    assert renderer.positions[(0, 0)][1] == renderer.positions[(0, 1)][1]
@@ -0,0 +1,56 @@
+import random
+
+from Movie_Theater import HeadlessSeatBooking, ReplayDialogs, SessionRecorder, TheaterLayout, replay_session
+
+
+def test_recorded_session_replays_to_the_same_bookings(tmp_path):
+    path = str(tmp_path / "session.jsonl")
+    recorder = SessionRecorder(path, seed=7)
+    random.seed(recorder.seed)
+    app = HeadlessSeatBooking(TheaterLayout.default(), recorder=recorder, dialogs=ReplayDialogs([True]))
+    app.seat_map.reset()
+    app.seat_map.book(0, 0)
+    random.seed(recorder.seed)
+    recorder.begin()
+
+    app.select_seat(2, 2)
+    app.on_seat_hover(3, 3, True)
+    app.book_seat_manual()
+    app.row_var.set("D")
+    app.on_row_change("D")
+    app.seat_var.set("4")
+    app.on_seat_change("4")
+    app.book_seat_manual()
+    app.distancing_var.set(True)
+    app.on_distancing_change()
+    for _ in range(3):
+        app.book_random_seat()
+    # Cancel the seat booked in row D
+    app.row_var.set("D")
+    app.seat_var.set("4")
+    app.cancel_seat_manual()
+    recorder.close()
+
+    orders = dict(app.seat_map.orders)
+    assert len(orders) == 5
+    assert (3, 3) not in app.seat_map.booked_seats
+
+    latencies, seat_map = replay_session(path, headless=True)
+    assert seat_map.orders == orders
+    assert seat_map.distancing
+    assert len(latencies["book_random_seat"]) == 3
+    assert set(latencies) == {"select_seat", "on_seat_hover", "book_seat_manual", "on_row_change",
+                              "on_seat_change", "on_distancing_change", "book_random_seat", "cancel_seat_manual"}
+
+
+def test_headless_app_runs_the_real_handlers():
+    app = HeadlessSeatBooking(TheaterLayout.default(), dialogs=ReplayDialogs([]))
+    app.seat_map.reset()
+    app.select_seat(0, 0)
+    assert app.row_var.get() == "A" and app.seat_var.get() == "1"
+    app.book_seat_manual()
+    app.ui_scheduler.flush()
+    assert app.seat_map.booked_seats == {(0, 0): 1}
+    assert app.seat_buttons[0][0].options["state"] == "disabled"
+    assert app.booked_seats_label.options["text"] == "1"
+    assert app.dialogs.messages[-1][0] == "🎉 Booking Confirmed!"
@@ -0,0 +1,135 @@
+import pytest
+
+from Movie_Theater import AvailabilityCache, SeatMap, SeatUnavailableError
+
+
+@pytest.fixture
+def seat_map():
+    return SeatMap(
+        5, 5,
+        blocked=[(0, 2)],
+        wheelchair=[(4, 0), (4, 4)],
+        companion=[(4, 1), (4, 3)]
+    )
+
+
+def test_check_seat_free(seat_map):
+    assert seat_map.check_seat(1, 1) is None
+
+
+def test_check_seat_blocked(seat_map):
+    assert seat_map.check_seat(0, 2) == "Seat is blocked"
+    assert seat_map.total_seats == 24
+
+
+def test_check_seat_booked(seat_map):
+    seat_map.book(1, 1)
+    assert seat_map.check_seat(1, 1) == "Seat is already booked"
+    with pytest.raises(SeatUnavailableError):
+        seat_map.book(1, 1)
+
+
+def test_wheelchair_space_needs_accessible_booking(seat_map):
+    assert seat_map.check_seat(4, 0) == "Seat is a wheelchair space"
+    assert seat_map.check_seat(4, 0, accessible=True) is None
+
+
+def test_companion_seat_opens_next_to_booked_wheelchair_space(seat_map):
+    assert seat_map.check_seat(4, 1) == "Seat is reserved for wheelchair companions"
+    seat_map.book(4, 0, accessible=True)
+    assert seat_map.check_seat(4, 1) is None
+    # The other companion seat is still reserved
+    assert seat_map.check_seat(4, 3) == "Seat is reserved for wheelchair companions"
+
+
+def test_find_party_skips_blocked_seats(seat_map):
+    # Row A has only seats 0-1 free either side of the blocked seat
+    assert seat_map.find_party(3) == [(1, 0), (1, 1), (1, 2)]
+    assert seat_map.find_party(2) == [(0, 0), (0, 1)]
+
+
+def test_find_party_too_large(seat_map):
+    assert seat_map.find_party(6) is None
+    assert seat_map.find_party(0) is None
+
+
+def test_find_party_accessible_includes_wheelchair_space(seat_map):
+    seats = seat_map.find_party(2, accessible=True)
+    assert seats == [(4, 0), (4, 1)]
+
+
+def test_find_party_regular_avoids_restricted_seats(seat_map):
+    for row, col in [(0, 0), (0, 1), (0, 3), (0, 4)]:
+        seat_map.book(row, col)
+    for _ in range(3):
+        seat_map.book_party(5)
+    assert seat_map.find_party(1) == [(4, 2)]
+    assert seat_map.find_party(2) is None
+
+
+def test_distancing_blocks_neighbours(seat_map):
+    seat_map.distancing = True
+    seat_map.book(1, 2)
+    assert seat_map.check_seat(1, 1) == "An empty seat must be left between parties"
+    assert seat_map.check_seat(1, 3) == "An empty seat must be left between parties"
+    assert seat_map.check_seat(1, 0) is None
+    assert seat_map.check_seat(2, 2) is None
+
+
+def test_distancing_party_allocation(seat_map):
+    seat_map.distancing = True
+    seat_map.book(1, 1)
+    # Row B only has seats 3-4 left that are not next to B2
+    assert seat_map.find_party(3) == [(2, 0), (2, 1), (2, 2)]
+    assert [col for col in range(5) if seat_map.check_seat(1, col) is None] == [3, 4]
+
+
+def test_distancing_exempts_companion_of_booked_wheelchair_space(seat_map):
+    seat_map.distancing = True
+    seat_map.book(4, 0, accessible=True)
+    assert seat_map.check_seat(4, 1) is None
+
+
+def test_version_only_moves_when_seats_change(seat_map):
+    cache = AvailabilityCache(seat_map)
+    snapshot = cache.get()
+    version = seat_map.version
+    with pytest.raises(SeatUnavailableError):
+        seat_map.book(0, 2)
+    assert seat_map.book_party(6) is None
+    assert seat_map.hold_party(6, ttl=10) is None
+    assert seat_map.expire_holds() == []
+    assert seat_map.version == version
+    assert cache.get() is snapshot
+
+    seat_map.book(1, 1)
+    assert seat_map.version == version + 1
+    seat_map.book_party(3)
+    assert seat_map.version == version + 2
+    assert seat_map.sequence % 2 == 0
+
+
+def test_join_waitlist_books_at_once_when_seats_are_free(seat_map):
+    request_id, order_id = seat_map.join_waitlist(2)
+    assert request_id is None
+    assert seat_map.orders[order_id] == [(0, 0), (0, 1)]
+    assert len(seat_map.waitlist) == 0
+
+
+def test_waitlist_is_served_from_released_seats(seat_map):
+    while seat_map.book_party(1):
+        pass
+    allocated = []
+    seat_map.on_waitlist_allocated = lambda request_id, order_id, seats: allocated.append((request_id, seats))
+
+    first, _ = seat_map.join_waitlist(2)
+    second, _ = seat_map.join_waitlist(1)
+    assert len(seat_map.waitlist) == 2
+
+    seat_map.cancel_seat(2, 2)
+    assert allocated == [(second, [(2, 2)])]
+
+    seat_map.cancel_order(seat_map.booked_seats[(3, 1)])
+    seat_map.cancel_order(seat_map.booked_seats[(3, 2)])
+    assert allocated[-1] == (first, [(3, 1), (3, 2)])
+    assert len(seat_map.waitlist) == 0
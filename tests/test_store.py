@@ -0,0 +1,152 @@
+import pytest
+
+from Movie_Theater import SeatMap, SQLiteBookingStore, TheaterLayout
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SQLiteBookingStore(str(tmp_path / "bookings.db"), pool_size=2)
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def layout():
+    return TheaterLayout.from_dict({"name": "Test", "rows": [{"label": label, "seats": 4} for label in "ABC"]})
+
+
+def open_show(store, layout):
+    store.add_show("main", layout)
+    seat_map = SeatMap.from_layout(layout)
+    seat_map.restore(store.load_orders("main"))
+    seat_map.journal = store
+    return seat_map
+
+
+def test_load_orders_leaves_holds_until_purged(store, layout):
+    seat_map = open_show(store, layout)
+    seat_map.book_party(2)
+    seat_map.hold_party(3, ttl=60)
+
+    assert store.load_orders("main") == {1: [(0, 0), (0, 1)]}
+    assert store.count("main", "held") == 3
+    assert store.purge_holds("main") == 3
+    assert store.count("main", "held") == 0
+    assert store.count("main") == 2
+
+
+def test_restart_restores_confirmed_orders(store, layout):
+    seat_map = open_show(store, layout)
+    seat_map.book(1, 2)
+    seat_map.book_party(3)
+
+    restored = open_show(store, layout)
+    assert restored.booked_seats == seat_map.booked_seats
+    assert restored.book_party(1) == [(0, 3)]
+
+
+def state(seat_map):
+    return (dict(seat_map.booked_seats), {k: list(v) for k, v in seat_map.orders.items()}, dict(seat_map.holds),
+            list(seat_map.occupied), seat_map.free_count, list(seat_map.row_max_run), sorted(seat_map._free_pool),
+            dict(seat_map.waitlist.requests))
+
+
+def fail(*args, **kwargs):
+    raise RuntimeError("disk full")
+
+
+def test_cancellation_and_waitlist_allocation_commit_together(store, layout):
+    seat_map = open_show(store, layout)
+    while seat_map.book_party(1):
+        pass
+    seat_map.join_waitlist(1)
+    order_id = seat_map.booked_seats[(2, 3)]
+    before = state(seat_map)
+    version = seat_map.version
+
+    store.order_created = fail
+    with pytest.raises(RuntimeError):
+        seat_map.cancel_order(order_id)
+    # The cancellation was rolled back with the failed allocation, on disk and in memory
+    assert store.count("main") == 12
+    assert state(seat_map) == before
+    assert len(seat_map.waitlist) == 1
+    assert seat_map.sequence % 2 == 0 and seat_map.version == version + 1
+
+    # The waiting party keeps its place and is seated once the journal works again
+    del store.order_created
+    seat_map.cancel_seat(2, 3)
+    assert seat_map.booked_seats[(2, 3)] != order_id
+    assert len(seat_map.waitlist) == 0
+    assert store.load_orders("main") == seat_map.orders
+
+
+def test_failed_reset_leaves_the_map_unchanged(store, layout):
+    seat_map = open_show(store, layout)
+    seat_map.book_party(3)
+    order_id, _ = seat_map.hold_party(2, ttl=60)
+    seat_map.waitlist.add(4)
+    before = state(seat_map)
+
+    store.order_created = fail
+    with pytest.raises(RuntimeError):
+        seat_map.reset()
+    assert state(seat_map) == before
+    assert store.count("main") == 3 and store.count("main", "held") == 2
+
+    store.hold_confirmed = fail
+    with pytest.raises(RuntimeError):
+        seat_map.confirm_hold(order_id)
+    assert order_id in seat_map.holds
+
+
+def test_add_show_rejects_a_changed_layout(store, layout):
+    store.add_show("main", layout)
+    store.add_show("main", layout)
+    wider = TheaterLayout.from_dict({"name": "Test", "rows": [{"label": label, "seats": 5} for label in "ABC"]})
+    with pytest.raises(ValueError):
+        store.add_show("main", wider)
+
+
+def test_restore_rejects_seats_outside_the_layout(layout):
+    seat_map = SeatMap.from_layout(layout)
+    with pytest.raises(ValueError):
+        seat_map.restore({1: [(0, 0)], 2: [(3, 0)]})
+    with pytest.raises(ValueError):
+        seat_map.restore({1: [(0, 0)], 2: [(0, 0)]})
+    assert seat_map.orders == {}
+    assert seat_map.free_count == 12
+
+
+def test_load_orders_can_include_unexpired_holds(store, layout):
+    seat_map = open_show(store, layout)
+    seat_map.book_party(2)
+    order_id, held = seat_map.hold_party(3, ttl=60)
+    seat_map.hold_party(1, ttl=-1)
+
+    orders = store.load_orders("main", include_held=True)
+    assert sorted(orders) == [1, order_id]
+    assert orders[order_id] == held
+    assert store.count("main", "held") == 4
+
+
+def test_saved_show_keeps_its_layout(store):
+    layout = TheaterLayout.load("layouts/grand_hall.json", use_cache=False)
+    store.add_show("main", layout)
+    saved = store.load_layout("main")
+    assert saved.fingerprint() == layout.fingerprint()
+    assert saved.seat_names == layout.seat_names
+    assert store.load_layout("other") is None
+
+
+def test_reads_inside_a_batch_reuse_its_connection(tmp_path, layout):
+    store = SQLiteBookingStore(str(tmp_path / "single.db"), pool_size=1)
+    try:
+        store.add_show("main", layout)
+        with store.batch():
+            store.order_created("main", 1, [(0, 0), (0, 1)])
+            # Reads see the pending write instead of waiting for a second connection
+            assert store.count("main") == 2
+            assert store.load_orders("main") == {1: [(0, 0), (0, 1)]}
+    finally:
+        store.close()
@@ -0,0 +1,79 @@
+from Movie_Theater import UIScheduler
+
+
+class FakeRoot:
+    """Stands in for a Tk root: ``after`` jobs run only when the test calls ``run_pending``"""
+
+    def __init__(self):
+        self.jobs = {}
+        self._ids = 0
+
+    def after(self, delay, callback):
+        self._ids += 1
+        job = f"after#{self._ids}"
+        self.jobs[job] = callback
+        return job
+
+    def after_cancel(self, job):
+        del self.jobs[job]
+
+    def run_pending(self):
+        jobs, self.jobs = self.jobs, {}
+        for callback in jobs.values():
+            callback()
+
+
+def test_repeated_requests_run_once_per_frame():
+    root = FakeRoot()
+    scheduler = UIScheduler(root)
+    calls = []
+    for n in range(10):
+        scheduler.schedule("statistics", lambda n=n: calls.append(n))
+    assert len(root.jobs) == 1
+    assert calls == []
+
+    root.run_pending()
+    # Only the latest callback for a key runs
+    assert calls == [9]
+    assert scheduler.frames == 1
+    assert scheduler.requests == 10
+
+    root.run_pending()
+    assert calls == [9]
+
+
+def test_different_keys_share_a_frame():
+    root = FakeRoot()
+    scheduler = UIScheduler(root)
+    calls = []
+    scheduler.schedule("statistics", lambda: calls.append("statistics"))
+    scheduler.schedule("repaint", lambda: calls.append("repaint"))
+    scheduler.schedule("statistics", lambda: calls.append("statistics"))
+    root.run_pending()
+    assert calls == ["statistics", "repaint"]
+    assert scheduler.frames == 1
+
+
+def test_flush_runs_pending_work_and_cancels_the_frame():
+    root = FakeRoot()
+    scheduler = UIScheduler(root)
+    calls = []
+    scheduler.schedule("statistics", lambda: calls.append("statistics"))
+    scheduler.flush()
+    assert calls == ["statistics"]
+    assert root.jobs == {}
+
+    # Nothing pending: flush is a no-op
+    scheduler.flush()
+    assert calls == ["statistics"]
+
+
+def test_disabled_scheduler_runs_immediately():
+    root = FakeRoot()
+    scheduler = UIScheduler(root, enabled=False)
+    calls = []
+    scheduler.schedule("statistics", lambda: calls.append(1))
+    scheduler.schedule("statistics", lambda: calls.append(2))
+    assert calls == [1, 2]
+    assert root.jobs == {}
+    assert scheduler.frames == 0